@@ -22,9 +22,143 @@ function Resize ()
     }
 }
 
+let searchIndex = null;
+let searchIndexRequested = false;
+
+function LoadSearchIndex (onReady)
+{
+    if (searchIndexRequested) {
+        return;
+    }
+    searchIndexRequested = true;
+    fetch ('search_index.json').then ((response) => {
+        return response.json ();
+    }).then ((index) => {
+        index.nameTerms = Object.keys (index.names).sort ();
+        index.wordTerms = Object.keys (index.words).sort ();
+        searchIndex = index;
+        onReady ();
+    }).catch (() => {
+        searchIndexRequested = false;
+    });
+}
+
+function AddTermScores (terms, sortedTerms, word, weight, scores)
+{
+    let start = 0;
+    let end = sortedTerms.length;
+    while (start < end) {
+        let middle = Math.floor ((start + end) / 2);
+        if (sortedTerms[middle] < word) {
+            start = middle + 1;
+        } else {
+            end = middle;
+        }
+    }
+    for (let i = start; i < sortedTerms.length && sortedTerms[i].startsWith (word); i++) {
+        let term = sortedTerms[i];
+        let score = (term === word ? 2 * weight : weight);
+        for (let entryId of terms[term]) {
+            let oldScore = scores.get (entryId);
+            if (oldScore === undefined || oldScore < score) {
+                scores.set (entryId, score);
+            }
+        }
+    }
+}
+
+function SearchEntries (query)
+{
+    let words = query.toLowerCase ().match (/[a-z0-9]+/g);
+    if (words === null) {
+        return [];
+    }
+    let scores = null;
+    for (let word of words) {
+        let wordScores = new Map ();
+        AddTermScores (searchIndex.words, searchIndex.wordTerms, word, 1, wordScores);
+        AddTermScores (searchIndex.names, searchIndex.nameTerms, word, 10, wordScores);
+        if (scores === null) {
+            scores = wordScores;
+        } else {
+            let merged = new Map ();
+            for (let [entryId, score] of wordScores) {
+                if (scores.has (entryId)) {
+                    merged.set (entryId, scores.get (entryId) + score);
+                }
+            }
+            scores = merged;
+        }
+    }
+    let result = Array.from (scores.keys ());
+    result.sort ((a, b) => {
+        if (scores.get (a) !== scores.get (b)) {
+            return scores.get (b) - scores.get (a);
+        }
+        return searchIndex.entries[a][0].length - searchIndex.entries[b][0].length;
+    });
+    return result.slice (0, 50).map ((entryId) => searchIndex.entries[entryId]);
+}
+
+function UpdateSearchResults ()
+{
+    let searchInput = document.getElementById ('search_input');
+    let resultsDiv = document.getElementById ('search_results');
+    let sectionsDiv = document.getElementById ('navigation_sections');
+    let query = searchInput.value.trim ();
+    resultsDiv.innerHTML = '';
+    if (query.length === 0) {
+        resultsDiv.style.display = 'none';
+        sectionsDiv.style.display = 'block';
+        return;
+    }
+    resultsDiv.style.display = 'block';
+    sectionsDiv.style.display = 'none';
+    if (searchIndex === null) {
+        LoadSearchIndex (UpdateSearchResults);
+        return;
+    }
+    let entries = SearchEntries (query);
+    if (entries.length === 0) {
+        let emptyDiv = document.createElement ('div');
+        emptyDiv.className = 'search_empty';
+        emptyDiv.innerText = 'No results';
+        resultsDiv.appendChild (emptyDiv);
+        return;
+    }
+    for (let entry of entries) {
+        let itemDiv = document.createElement ('div');
+        itemDiv.className = 'navigation_item';
+        let link = document.createElement ('a');
+        link.href = entry[1];
+        link.innerText = entry[0];
+        itemDiv.appendChild (link);
+        let kindSpan = document.createElement ('span');
+        kindSpan.className = 'search_kind';
+        kindSpan.innerText = entry[2];
+        itemDiv.appendChild (kindSpan);
+        resultsDiv.appendChild (itemDiv);
+    }
+}
+
+function InitSearch ()
+{
+    let searchInput = document.getElementById ('search_input');
+    if (searchInput === null) {
+        return;
+    }
+    searchInput.addEventListener ('focus', () => {
+        LoadSearchIndex (UpdateSearchResults);
+    });
+    searchInput.addEventListener ('input', () => {
+        UpdateSearchResults ();
+    });
+}
+
 function Init (menuName)
 {
     Resize ();
+    InitSearch ();
     let menuItem = document.getElementById ('nav-' + menuName);
     if (menuItem !== null) {
         menuItem.classList.add ('selected');
@@ -1,22 +1,76 @@
 import os
 import sys
 import math
+import array
+import struct
+import bisect
+import mmap
+import json
+import base64
+import hashlib
+import concurrent.futures
 
-from lib import tools_lib as Tools
+sys.path.append (os.path.join (os.path.dirname (os.path.dirname (os.path.abspath (__file__))), 'tools'))
+from lib import utils as Tools
 
-class ObjWriter:
-	def __init__ (self):
-		self.content = ''
+FormatBatchSize = 4096
+MeshBatchSize = 1 << 16
+SplitMixIncrement = 0x9E3779B97F4A7C15
+SplitMixMask = (1 << 64) - 1
+MemoryMapThreshold = 1 << 28
+
+class TextWriter:
+	def __init__ (self, stream = None, bufferSize = 1 << 20):
+		self.stream = stream
+		self.bufferSize = bufferSize
+		self.chunks = []
+		self.chunksLength = 0
+
+	def GetContent (self):
+		assert (self.stream == None)
+		return ''.join (self.chunks)
+
+	def TakeContent (self):
+		content = ''.join (self.chunks)
+		self.chunks = []
+		self.chunksLength = 0
+		return content
+
+	def Flush (self):
+		if self.stream == None or self.chunksLength == 0:
+			return
+		self.stream.write (self.TakeContent ())
+
+	def AddLine (self, line):
+		self.AddText (line + '\n')
+
+	def AddText (self, text):
+		self.chunks.append (text)
+		self.chunksLength += len (text)
+		if self.stream != None and self.chunksLength >= self.bufferSize:
+			self.Flush ()
+
+	def AddFormattedLines (self, lineFormat, values, valuesPerLine):
+		batchValues = FormatBatchSize * valuesPerLine
+		batchFormat = lineFormat * FormatBatchSize
+		for start in range (0, len (values), batchValues):
+			batch = values[start : start + batchValues]
+			if len (batch) == batchValues:
+				self.AddText (batchFormat % tuple (batch))
+			else:
+				self.AddText ((lineFormat * (len (batch) // valuesPerLine)) % tuple (batch))
+
+class ObjWriter (TextWriter):
+	def __init__ (self, stream = None, bufferSize = 1 << 20):
+		super ().__init__ (stream, bufferSize)
 		self.offsetX = 0.0
 		self.offsetY = 0.0
 		self.offsetZ = 0.0
 		self.scale = 1.0
+		self.precision = None
 		self.vertexCount = 0
 		self.vertexOffset = 0
 
-	def GetContent (self):
-		return self.content
-
 	def SetOffset (self, x, y, z):
 		self.offsetX = x
 		self.offsetY = y
@@ -25,32 +79,117 @@ class ObjWriter:
 	def SetScale (self, scale):
 		self.scale = scale
 
+	def SetPrecision (self, precision):
+		self.precision = precision
+
 	def AddMesh (self, name):
 		self.AddLine ('g ' + name)
 		self.vertexOffset = self.vertexCount
 
 	def AddVertex (self, x, y, z):
+		if self.precision != None:
+			self.AddVertices ([x, y, z])
+			return
 		self.AddLine ('v ' + ' '.join ([str (x * self.scale + self.offsetX), str (y * self.scale + self.offsetY), str (z * self.scale + self.offsetZ)]))
 		self.vertexCount += 1
-	
+
+	def AddVertices (self, coordinates):
+		numberFormat = '%r' if self.precision == None else '%.' + str (self.precision) + 'f'
+		lineFormat = 'v ' + numberFormat + ' ' + numberFormat + ' ' + numberFormat + '\n'
+		scale = self.scale
+		offset = (self.offsetX, self.offsetY, self.offsetZ)
+		transformed = scale != 1.0 or offset != (0.0, 0.0, 0.0)
+		for batch in EnumerateValueBatches (coordinates, 3):
+			if hasattr (batch, 'ravel'):
+				values = (batch * scale + offset).ravel ().tolist ()
+			elif transformed:
+				offsets = offset * (len (batch) // 3)
+				values = [value * scale + offset for value, offset in zip (batch, offsets)]
+			else:
+				values = batch
+			assert (len (values) % 3 == 0)
+			self.AddFormattedLines (lineFormat, values, 3)
+			self.vertexCount += len (values) // 3
+
 	def AddFace (self, vertices):
 		objVertices = []
 		for vertex in vertices:
 			objVertices.append (str (vertex + self.vertexOffset + 1))
 		self.AddLine ('f ' + ' '.join (objVertices))
 
-	def AddLine (self, line):
-		self.content += line + '\n'
+	def AddFaces (self, indices, verticesPerFace = 3):
+		indexOffset = self.vertexOffset + 1
+		lineFormat = 'f' + ' %d' * verticesPerFace + '\n'
+		for batch in EnumerateValueBatches (indices, verticesPerFace):
+			if hasattr (batch, 'ravel'):
+				values = (batch + indexOffset).ravel ().tolist ()
+			else:
+				values = [index + indexOffset for index in batch]
+			assert (len (values) % verticesPerFace == 0)
+			self.AddFormattedLines (lineFormat, values, verticesPerFace)
 
-def DistFromOrigin (x, y, z):
-	return math.sqrt (x * x + y * y + z * z)
+def GetFlatList (values):
+	if hasattr (values, 'tolist'):
+		values = values.tolist ()
+	if len (values) == 0 or not isinstance (values[0], (list, tuple)):
+		return values if isinstance (values, list) else list (values)
+	result = []
+	for value in values:
+		if isinstance (value, (list, tuple)):
+			result.extend (value)
+		else:
+			result.append (value)
+	return result
 
-def Main (argv):
-	currentDir = os.path.dirname (os.path.abspath (__file__))
-	os.chdir (currentDir)
+def EnumerateValueBatches (values, valuesPerItem):
+	# yields at most FormatBatchSize items at a time, so the input is never
+	# copied as a whole, numpy arrays are yielded as slices of rows
+	if hasattr (values, 'reshape'):
+		rows = values.reshape (-1, valuesPerItem)
+		for start in range (0, len (rows), FormatBatchSize):
+			yield rows[start : start + FormatBatchSize]
+		return
+	if len (values) > 0 and isinstance (values[0], (list, tuple)):
+		for start in range (0, len (values), FormatBatchSize):
+			yield GetFlatList (values[start : start + FormatBatchSize])
+		return
+	batchValues = FormatBatchSize * valuesPerItem
+	for start in range (0, len (values), batchValues):
+		yield GetFlatList (values[start : start + batchValues])
 
-	ow = ObjWriter ()
+def RunWriterCallback (addContent, ow):
+	# addContent receives the writer, it is either a plain function or a
+	# generator function that yields after each batch of elements
+	result = addContent (ow)
+	if result == None:
+		return
+	if not hasattr (result, '__next__'):
+		raise TypeError ('The writer callback must be a function or a generator function.')
+	for _ in result:
+		yield
 
+def GenerateObjChunks (addContent, bufferSize = 1 << 20):
+	# with a generator function only one buffer is kept in memory, a plain
+	# function is buffered until it returns
+	ow = ObjWriter (None, bufferSize)
+	for _ in RunWriterCallback (addContent, ow):
+		if ow.chunksLength >= bufferSize:
+			yield ow.TakeContent ()
+	content = ow.TakeContent ()
+	if len (content) > 0:
+		yield content
+
+def WriteObjToFile (filePath, addContent, bufferSize = 1 << 20):
+	with open (filePath, 'w', encoding = 'utf-8', newline = '\n') as objFile:
+		ow = ObjWriter (objFile, bufferSize)
+		for _ in RunWriterCallback (addContent, ow):
+			pass
+		ow.Flush ()
+
+def DistFromOrigin (x, y, z):
+	return math.sqrt (x * x + y * y + z * z)
+
+def AddSolids (ow):
 	ow.AddMesh ('Tetrahedron')
 	a = 1.0
 	ow.SetOffset (0.0, 0.0, 0.0)
@@ -182,9 +321,708 @@ def Main (argv):
 	ow.AddFace ([6, 11, 10])
 	ow.AddFace ([7, 10, 11])
 
+class TestMesh:
+	# vertices and triangles are computed from their index, so the mesh is
+	# generated and written in batches without keeping all of it in memory
+	def __init__ (self, name, vertexCount, triangleCount):
+		self.name = name
+		self.vertexCount = vertexCount
+		self.triangleCount = triangleCount
+		self.noise = 0.0
+		self.noiseSeed = 0
+
+	def VertexCount (self):
+		return self.vertexCount
+
+	def TriangleCount (self):
+		return self.triangleCount
+
+	def SetNoise (self, amount, seed):
+		self.noise = amount
+		self.noiseSeed = seed
+
+	def GetVertex (self, index):
+		raise Exception ('Not implemented.')
+
+	def GetTriangle (self, index):
+		raise Exception ('Not implemented.')
+
+	def GetVertices (self, start, end):
+		# subclasses can override the range methods with faster loops, the
+		# result must be the same as calling the single element methods
+		vertices = array.array ('d')
+		for index in range (start, end):
+			vertices.extend (self.GetVertex (index))
+		return vertices
+
+	def GetTriangles (self, start, end):
+		triangles = array.array ('I')
+		for index in range (start, end):
+			triangles.extend (self.GetTriangle (index))
+		return triangles
+
+	def AddNoise (self, vertices, start):
+		for i in range (0, len (vertices), 3):
+			nx, ny, nz = GetNoiseValues (self.noiseSeed, start + i // 3)
+			vertices[i] += nx * self.noise
+			vertices[i + 1] += ny * self.noise
+			vertices[i + 2] += nz * self.noise
+
+	def GetPositions (self, indices):
+		# the positions of the given vertices, every distinct vertex is
+		# computed once
+		positionMap = {}
+		for index in indices:
+			if not index in positionMap:
+				vertex = array.array ('d', self.GetVertex (index))
+				if self.noise > 0.0:
+					self.AddNoise (vertex, index)
+				positionMap[index] = vertex
+		positions = array.array ('d')
+		for index in indices:
+			positions.extend (positionMap[index])
+		return positions
+
+	def EnumerateVertexBatches (self):
+		for start in range (0, self.vertexCount, MeshBatchSize):
+			vertices = self.GetVertices (start, min (start + MeshBatchSize, self.vertexCount))
+			if self.noise > 0.0:
+				self.AddNoise (vertices, start)
+			yield vertices
+
+	def EnumerateTriangleBatches (self):
+		for start in range (0, self.triangleCount, MeshBatchSize):
+			yield self.GetTriangles (start, min (start + MeshBatchSize, self.triangleCount))
+
+class TestIcosphere (TestMesh):
+	# every icosahedron face is split into a triangular grid of the given
+	# frequency, vertex indices are the 12 corners, then the inner points of
+	# the 30 edges, then the inner points of the 20 faces
+	def __init__ (self, frequency):
+		super ().__init__ ('Icosphere', 10 * frequency * frequency + 2, 20 * frequency * frequency)
+		a = 1.0
+		b = 0.0
+		c = (1.0 + math.sqrt (5.0)) / 2.0
+		length = DistFromOrigin (b, a, c)
+		self.corners = [(x / length, y / length, z / length) for x, y, z in [
+			(+b, +a, +c), (+b, +a, -c), (+b, -a, +c), (+b, -a, -c),
+			(+a, +c, +b), (+a, -c, +b), (-a, +c, +b), (-a, -c, +b),
+			(+c, +b, +a), (+c, +b, -a), (-c, +b, +a), (-c, +b, -a)
+		]]
+		self.faces = [
+			(0, 2, 8), (0, 4, 6), (0, 6, 10), (0, 8, 4), (0, 10, 2),
+			(1, 3, 11), (1, 4, 9), (1, 6, 4), (1, 9, 3), (1, 11, 6),
+			(2, 5, 8), (2, 7, 5), (2, 10, 7), (3, 5, 7), (3, 7, 11),
+			(3, 9, 5), (4, 8, 9), (5, 9, 8), (6, 11, 10), (7, 10, 11)
+		]
+		self.frequency = frequency
+		self.edges = sorted (set ((min (v0, v1), max (v0, v1)) for face in self.faces for v0, v1 in [(face[0], face[1]), (face[1], face[2]), (face[2], face[0])]))
+		self.edgeIndices = { edge : index for index, edge in enumerate (self.edges) }
+		self.edgeStart = 12
+		self.faceStart = self.edgeStart + len (self.edges) * (frequency - 1)
+		self.faceVertexCount = (frequency - 1) * (frequency - 2) // 2
+		# first inner point of every inner grid row, and first triangle of every row
+		self.innerRowStarts = [0]
+		for row in range (1, frequency - 1):
+			self.innerRowStarts.append (self.innerRowStarts[-1] + frequency - 1 - row)
+		self.triangleRowStarts = [0]
+		for row in range (0, frequency - 1):
+			self.triangleRowStarts.append (self.triangleRowStarts[-1] + 2 * (frequency - row) - 1)
+
+	def GetGridPoint (self, c0, c1, c2, i, j):
+		n = self.frequency
+		x = c0[0] + (c1[0] - c0[0]) * i / n + (c2[0] - c0[0]) * j / n
+		y = c0[1] + (c1[1] - c0[1]) * i / n + (c2[1] - c0[1]) * j / n
+		z = c0[2] + (c1[2] - c0[2]) * i / n + (c2[2] - c0[2]) * j / n
+		length = DistFromOrigin (x, y, z)
+		return x / length, y / length, z / length
+
+	def GetVertex (self, index):
+		if index < self.edgeStart:
+			return self.corners[index]
+		if index < self.faceStart:
+			edge, step = divmod (index - self.edgeStart, self.frequency - 1)
+			v0, v1 = self.edges[edge]
+			return self.GetGridPoint (self.corners[v0], self.corners[v1], self.corners[v0], step + 1, 0)
+		face, local = divmod (index - self.faceStart, self.faceVertexCount)
+		row = bisect.bisect_right (self.innerRowStarts, local) - 1
+		v0, v1, v2 = self.faces[face]
+		return self.GetGridPoint (self.corners[v0], self.corners[v1], self.corners[v2], local - self.innerRowStarts[row] + 1, row + 1)
+
+	def GetEdgeVertex (self, v0, v1, step):
+		if v0 < v1:
+			return self.edgeStart + self.edgeIndices[(v0, v1)] * (self.frequency - 1) + step - 1
+		return self.edgeStart + self.edgeIndices[(v1, v0)] * (self.frequency - 1) + self.frequency - step - 1
+
+	def GetFaceVertex (self, face, i, j):
+		n = self.frequency
+		v0, v1, v2 = self.faces[face]
+		if j == 0:
+			if i == 0:
+				return v0
+			if i == n:
+				return v1
+			return self.GetEdgeVertex (v0, v1, i)
+		if i == 0:
+			if j == n:
+				return v2
+			return self.GetEdgeVertex (v0, v2, j)
+		if i + j == n:
+			return self.GetEdgeVertex (v1, v2, j)
+		return self.faceStart + face * self.faceVertexCount + self.innerRowStarts[j - 1] + i - 1
+
+	def GetTriangle (self, index):
+		face, local = divmod (index, self.frequency * self.frequency)
+		row = bisect.bisect_right (self.triangleRowStarts, local) - 1
+		i, down = divmod (local - self.triangleRowStarts[row], 2)
+		if down:
+			return (self.GetFaceVertex (face, i + 1, row), self.GetFaceVertex (face, i + 1, row + 1), self.GetFaceVertex (face, i, row + 1))
+		return (self.GetFaceVertex (face, i, row), self.GetFaceVertex (face, i + 1, row), self.GetFaceVertex (face, i, row + 1))
+
+	def GetTriangles (self, start, end):
+		# the vertices of two neighbouring grid rows are looked up once for
+		# all the triangles between them
+		n = self.frequency
+		triangles = array.array ('I')
+		index = start
+		while index < end:
+			face, local = divmod (index, n * n)
+			row = bisect.bisect_right (self.triangleRowStarts, local) - 1
+			rowStart = face * n * n + self.triangleRowStarts[row]
+			rowEnd = min (rowStart + 2 * (n - row) - 1, end)
+			bottom = [self.GetFaceVertex (face, i, row) for i in range (0, n - row + 1)]
+			top = [self.GetFaceVertex (face, i, row + 1) for i in range (0, n - row)]
+			for local in range (index - rowStart, rowEnd - rowStart):
+				i, down = divmod (local, 2)
+				if down:
+					triangles.extend ((bottom[i + 1], top[i + 1], top[i]))
+				else:
+					triangles.extend ((bottom[i], bottom[i + 1], top[i]))
+			index = rowEnd
+		return triangles
+
+class TestGrid (TestMesh):
+	def __init__ (self, rows, columns):
+		super ().__init__ ('Grid', (rows + 1) * (columns + 1), 2 * rows * columns)
+		self.rows = rows
+		self.columns = columns
+
+	def GetVertex (self, index):
+		row, column = divmod (index, self.columns + 1)
+		return column / self.columns, row / self.rows, 0.0
+
+	def GetTriangle (self, index):
+		cell, second = divmod (index, 2)
+		row, column = divmod (cell, self.columns)
+		v0 = row * (self.columns + 1) + column
+		v2 = v0 + self.columns + 1
+		if second:
+			return (v0, v2 + 1, v2)
+		return (v0, v0 + 1, v2 + 1)
+
+	def GetVertices (self, start, end):
+		vertices = array.array ('d')
+		rows = self.rows
+		columns = self.columns
+		for index in range (start, end):
+			row, column = divmod (index, columns + 1)
+			vertices.extend ((column / columns, row / rows, 0.0))
+		return vertices
+
+class TestTorus (TestMesh):
+	def __init__ (self, majorSegments, minorSegments, majorRadius = 1.0, minorRadius = 0.3):
+		super ().__init__ ('Torus', majorSegments * minorSegments, 2 * majorSegments * minorSegments)
+		self.majorSegments = majorSegments
+		self.minorSegments = minorSegments
+		self.majorRadius = majorRadius
+		self.minorRadius = minorRadius
+		majorAngles = [2.0 * math.pi * i / majorSegments for i in range (majorSegments)]
+		minorAngles = [2.0 * math.pi * j / minorSegments for j in range (minorSegments)]
+		self.majorCos = [math.cos (u) for u in majorAngles]
+		self.majorSin = [math.sin (u) for u in majorAngles]
+		self.minorRadii = [majorRadius + minorRadius * math.cos (v) for v in minorAngles]
+		self.minorHeights = [minorRadius * math.sin (v) for v in minorAngles]
+
+	def GetVertex (self, index):
+		i, j = divmod (index, self.minorSegments)
+		radius = self.minorRadii[j]
+		return radius * self.majorCos[i], radius * self.majorSin[i], self.minorHeights[j]
+
+	def GetVertices (self, start, end):
+		vertices = array.array ('d')
+		majorCos = self.majorCos
+		majorSin = self.majorSin
+		minorRadii = self.minorRadii
+		minorHeights = self.minorHeights
+		for index in range (start, end):
+			i, j = divmod (index, self.minorSegments)
+			radius = minorRadii[j]
+			vertices.extend ((radius * majorCos[i], radius * majorSin[i], minorHeights[j]))
+		return vertices
+
+	def GetTriangle (self, index):
+		cell, second = divmod (index, 2)
+		i, j = divmod (cell, self.minorSegments)
+		nextI = (i + 1) % self.majorSegments
+		nextJ = (j + 1) % self.minorSegments
+		v0 = i * self.minorSegments + j
+		if second:
+			return (v0, nextI * self.minorSegments + nextJ, i * self.minorSegments + nextJ)
+		return (v0, nextI * self.minorSegments + j, nextI * self.minorSegments + nextJ)
+
+def GetNoiseValues (seed, index):
+	# splitmix64 of the seed and the vertex index, so the noise of a vertex
+	# is the same in every batch and every format
+	values = []
+	state = (seed + index * 3 * SplitMixIncrement) & SplitMixMask
+	for _ in range (3):
+		state = (state + SplitMixIncrement) & SplitMixMask
+		value = state
+		value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & SplitMixMask
+		value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & SplitMixMask
+		value ^= value >> 31
+		values.append (value / 9223372036854775808.0 - 1.0)
+	return values
+
+def GenerateMeshForTriangleCount (shape, triangleCount):
+	if shape == 'icosphere':
+		# an icosphere of frequency n has 20 * n * n triangles
+		frequency = max (1, round (math.sqrt (triangleCount / 20.0)))
+		return TestIcosphere (frequency)
+	elif shape == 'grid':
+		size = max (1, round (math.sqrt (triangleCount / 2.0)))
+		return TestGrid (size, size)
+	elif shape == 'torus':
+		minorSegments = max (3, round (math.sqrt (triangleCount / 4.0)))
+		majorSegments = max (3, round (triangleCount / (2.0 * minorSegments)))
+		return TestTorus (majorSegments, minorSegments)
+	raise Exception ('Unknown shape: ' + shape)
+
+def GetNumberFormat (precision):
+	return '%r' if precision == None else '%.' + str (precision) + 'f'
+
+def EnumerateFacetBatches (mesh):
+	# 12 values per triangle: the normal and the three vertices
+	for triangles in mesh.EnumerateTriangleBatches ():
+		positions = mesh.GetPositions (triangles)
+		batch = []
+		for i in range (0, len (positions), 9):
+			ax, ay, az, bx, by, bz, cx, cy, cz = positions[i : i + 9]
+			ux, uy, uz = bx - ax, by - ay, bz - az
+			vx, vy, vz = cx - ax, cy - ay, cz - az
+			nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+			length = DistFromOrigin (nx, ny, nz)
+			if length > 0.0:
+				nx, ny, nz = nx / length, ny / length, nz / length
+			batch.extend ((nx, ny, nz, ax, ay, az, bx, by, bz, cx, cy, cz))
+		yield batch
+
+def OpenTextFile (filePath):
+	return open (filePath, 'w', encoding = 'utf-8', newline = '\n')
+
+def WriteObjFile (filePath, mesh, precision):
+	with OpenTextFile (filePath) as objFile:
+		ow = ObjWriter (objFile)
+		ow.SetPrecision (precision)
+		ow.AddMesh (mesh.name)
+		for vertices in mesh.EnumerateVertexBatches ():
+			ow.AddVertices (vertices)
+		for triangles in mesh.EnumerateTriangleBatches ():
+			ow.AddFaces (triangles)
+		ow.Flush ()
+
+def WriteOffFile (filePath, mesh, precision):
+	numberFormat = GetNumberFormat (precision)
+	with OpenTextFile (filePath) as offFile:
+		tw = TextWriter (offFile)
+		tw.AddLine ('OFF')
+		tw.AddLine ('{0} {1} 0'.format (mesh.VertexCount (), mesh.TriangleCount ()))
+		for vertices in mesh.EnumerateVertexBatches ():
+			tw.AddFormattedLines (' '.join ([numberFormat] * 3) + '\n', vertices.tolist (), 3)
+		for triangles in mesh.EnumerateTriangleBatches ():
+			tw.AddFormattedLines ('3 %d %d %d\n', triangles.tolist (), 3)
+		tw.Flush ()
+
+def WriteAsciiStlFile (filePath, mesh, precision):
+	numberFormat = GetNumberFormat (precision)
+	vectorFormat = ' '.join ([numberFormat] * 3)
+	facetFormat = (
+		'facet normal ' + vectorFormat + '\n' +
+		'\touter loop\n' +
+		'\t\tvertex ' + vectorFormat + '\n' +
+		'\t\tvertex ' + vectorFormat + '\n' +
+		'\t\tvertex ' + vectorFormat + '\n' +
+		'\tendloop\n' +
+		'endfacet\n'
+	)
+	with OpenTextFile (filePath) as stlFile:
+		tw = TextWriter (stlFile)
+		tw.AddLine ('solid ' + mesh.name)
+		for batch in EnumerateFacetBatches (mesh):
+			tw.AddFormattedLines (facetFormat, batch, 12)
+		tw.AddLine ('endsolid ' + mesh.name)
+		tw.Flush ()
+
+class BinaryWriter:
+	def __init__ (self, filePath, fileSize, memoryMapped):
+		self.file = open (filePath, 'w+b' if memoryMapped else 'wb')
+		self.memoryMap = None
+		self.buffer = bytearray ()
+		self.position = 0
+		self.structs = {}
+		if memoryMapped:
+			self.file.truncate (fileSize)
+			self.memoryMap = mmap.mmap (self.file.fileno (), fileSize)
+
+	def WriteBytes (self, data):
+		data = memoryview (data).cast ('B')
+		if self.memoryMap != None:
+			self.memoryMap[self.position : self.position + len (data)] = data
+		else:
+			self.file.write (data)
+		self.position += len (data)
+
+	def WriteRecords (self, recordFormat, values, valuesPerRecord):
+		# packs a whole batch with one struct call, directly into the mapped
+		# file when possible, otherwise into a reused buffer
+		recordCount = len (values) // valuesPerRecord
+		key = (recordFormat, recordCount)
+		if not key in self.structs:
+			self.structs[key] = struct.Struct ('<' + recordFormat * recordCount)
+		recordsStruct = self.structs[key]
+		if self.memoryMap != None:
+			recordsStruct.pack_into (self.memoryMap, self.position, *values)
+		else:
+			if len (self.buffer) < recordsStruct.size:
+				self.buffer = bytearray (recordsStruct.size)
+			recordsStruct.pack_into (self.buffer, 0, *values)
+			self.file.write (memoryview (self.buffer)[: recordsStruct.size])
+		self.position += recordsStruct.size
+
+	def Close (self):
+		if self.memoryMap != None:
+			assert (self.position == len (self.memoryMap))
+			self.memoryMap.flush ()
+			self.memoryMap.close ()
+		self.file.close ()
+
+class BinaryStlWriter (BinaryWriter):
+	def __init__ (self, filePath, triangleCount, header, memoryMapped = False):
+		super ().__init__ (filePath, 84 + triangleCount * 50, memoryMapped)
+		self.WriteBytes (header.encode ('ascii')[: 80].ljust (80, b' '))
+		self.WriteBytes (struct.pack ('<I', triangleCount))
+
+	def AddTriangles (self, values):
+		# 12 values per triangle: normal and three vertices, attribute bytes are zero
+		self.WriteRecords ('12f2x', values, 12)
+
+class BinaryPlyWriter (BinaryWriter):
+	def __init__ (self, filePath, vertexCount, triangleCount, memoryMapped = False):
+		header = GetPlyHeader (vertexCount, triangleCount, 'binary_little_endian').encode ('ascii')
+		super ().__init__ (filePath, len (header) + vertexCount * 12 + triangleCount * 13, memoryMapped)
+		self.WriteBytes (header)
+
+	def AddVertices (self, coordinates):
+		if hasattr (coordinates, 'astype'):
+			self.WriteBytes (coordinates.astype ('<f4').tobytes ())
+			return
+		for start in range (0, len (coordinates), FormatBatchSize * 3):
+			positions = array.array ('f', coordinates[start : start + FormatBatchSize * 3])
+			if sys.byteorder != 'little':
+				positions.byteswap ()
+			self.WriteBytes (positions)
+
+	def AddTriangles (self, indices):
+		# indices are unsigned, as declared in the header
+		for start in range (0, len (indices), FormatBatchSize * 3):
+			batch = indices[start : start + FormatBatchSize * 3]
+			values = [3] * (len (batch) // 3 * 4)
+			values[1::4] = batch[0::3]
+			values[2::4] = batch[1::3]
+			values[3::4] = batch[2::3]
+			self.WriteRecords ('B3I', values, 4)
+
+def WriteBinaryStlFile (filePath, mesh):
+	triangleCount = mesh.TriangleCount ()
+	memoryMapped = 84 + triangleCount * 50 >= MemoryMapThreshold
+	writer = BinaryStlWriter (filePath, triangleCount, 'Online 3D Viewer test corpus: ' + mesh.name, memoryMapped)
+	for batch in EnumerateFacetBatches (mesh):
+		writer.AddTriangles (batch)
+	writer.Close ()
+
+def GetPlyHeader (vertexCount, triangleCount, format):
+	return '\n'.join ([
+		'ply',
+		'format ' + format + ' 1.0',
+		'comment Online 3D Viewer test corpus',
+		'element vertex ' + str (vertexCount),
+		'property float x',
+		'property float y',
+		'property float z',
+		'element face ' + str (triangleCount),
+		'property list uchar uint vertex_indices',
+		'end_header'
+	]) + '\n'
+
+def WriteAsciiPlyFile (filePath, mesh, precision):
+	numberFormat = GetNumberFormat (precision)
+	with OpenTextFile (filePath) as plyFile:
+		tw = TextWriter (plyFile)
+		tw.AddText (GetPlyHeader (mesh.VertexCount (), mesh.TriangleCount (), 'ascii'))
+		for vertices in mesh.EnumerateVertexBatches ():
+			tw.AddFormattedLines (' '.join ([numberFormat] * 3) + '\n', vertices.tolist (), 3)
+		for triangles in mesh.EnumerateTriangleBatches ():
+			tw.AddFormattedLines ('3 %d %d %d\n', triangles.tolist (), 3)
+		tw.Flush ()
+
+def WriteBinaryPlyFile (filePath, mesh):
+	vertexCount = mesh.VertexCount ()
+	triangleCount = mesh.TriangleCount ()
+	memoryMapped = vertexCount * 12 + triangleCount * 13 >= MemoryMapThreshold
+	writer = BinaryPlyWriter (filePath, vertexCount, triangleCount, memoryMapped)
+	for vertices in mesh.EnumerateVertexBatches ():
+		writer.AddVertices (vertices)
+	for triangles in mesh.EnumerateTriangleBatches ():
+		writer.AddTriangles (triangles)
+	writer.Close ()
+
+def GetLittleEndianBytes (values):
+	if sys.byteorder != 'little':
+		values = array.array (values.typecode, values)
+		values.byteswap ()
+	return values.tobytes ()
+
+def EnumerateGltfBufferChunks (mesh):
+	for vertices in mesh.EnumerateVertexBatches ():
+		yield GetLittleEndianBytes (array.array ('f', vertices))
+	for triangles in mesh.EnumerateTriangleBatches ():
+		yield GetLittleEndianBytes (triangles)
+
+class Base64Writer:
+	# encodes the data in pieces, the bytes that don't fill a whole base64
+	# group are kept for the next piece
+	def __init__ (self, file):
+		self.file = file
+		self.remainder = b''
+
+	def Write (self, data):
+		data = self.remainder + data
+		length = len (data) - len (data) % 3
+		self.file.write (base64.b64encode (data[: length]).decode ('ascii'))
+		self.remainder = data[length :]
+
+	def Close (self):
+		self.file.write (base64.b64encode (self.remainder).decode ('ascii'))
+		self.remainder = b''
+
+def WriteGltfFile (filePath, mesh, binary):
+	# the bounds are collected in a first pass over the vertices, then the
+	# buffer is written batch by batch
+	minValues = [math.inf, math.inf, math.inf]
+	maxValues = [-math.inf, -math.inf, -math.inf]
+	for vertices in mesh.EnumerateVertexBatches ():
+		positions = array.array ('f', vertices)
+		for i in range (3):
+			minValues[i] = min (minValues[i], min (positions[i::3]))
+			maxValues[i] = max (maxValues[i], max (positions[i::3]))
+	positionLength = mesh.VertexCount () * 12
+	indexLength = mesh.TriangleCount () * 12
+	bufferLength = positionLength + indexLength
+	gltf = {
+		'asset' : {
+			'version' : '2.0',
+			'generator' : 'Online 3D Viewer test corpus'
+		},
+		'scene' : 0,
+		'scenes' : [{ 'nodes' : [0] }],
+		'nodes' : [{ 'name' : mesh.name, 'mesh' : 0 }],
+		'meshes' : [{
+			'name' : mesh.name,
+			'primitives' : [{
+				'attributes' : { 'POSITION' : 0 },
+				'indices' : 1
+			}]
+		}],
+		'buffers' : [{ 'byteLength' : bufferLength }],
+		'bufferViews' : [
+			{ 'buffer' : 0, 'byteOffset' : 0, 'byteLength' : positionLength, 'target' : 34962 },
+			{ 'buffer' : 0, 'byteOffset' : positionLength, 'byteLength' : indexLength, 'target' : 34963 }
+		],
+		'accessors' : [
+			{ 'bufferView' : 0, 'componentType' : 5126, 'count' : mesh.VertexCount (), 'type' : 'VEC3', 'min' : minValues, 'max' : maxValues },
+			{ 'bufferView' : 1, 'componentType' : 5125, 'count' : mesh.TriangleCount () * 3, 'type' : 'SCALAR' }
+		]
+	}
+	if binary:
+		jsonBytes = json.dumps (gltf, separators = (',', ':')).encode ('utf-8')
+		jsonBytes += b' ' * (-len (jsonBytes) % 4)
+		binPadding = b'\x00' * (-bufferLength % 4)
+		binLength = bufferLength + len (binPadding)
+		with open (filePath, 'wb') as glbFile:
+			glbFile.write (struct.pack ('<4sII', b'glTF', 2, 12 + 8 + len (jsonBytes) + 8 + binLength))
+			glbFile.write (struct.pack ('<I4s', len (jsonBytes), b'JSON'))
+			glbFile.write (jsonBytes)
+			glbFile.write (struct.pack ('<I4s', binLength, b'BIN\x00'))
+			for chunk in EnumerateGltfBufferChunks (mesh):
+				glbFile.write (chunk)
+			glbFile.write (binPadding)
+	else:
+		uriPrefix = 'data:application/octet-stream;base64,'
+		gltf['buffers'][0]['uri'] = uriPrefix
+		jsonBefore, jsonAfter = json.dumps (gltf, separators = (',', ':')).split (uriPrefix)
+		with OpenTextFile (filePath) as gltfFile:
+			gltfFile.write (jsonBefore + uriPrefix)
+			base64Writer = Base64Writer (gltfFile)
+			for chunk in EnumerateGltfBufferChunks (mesh):
+				base64Writer.Write (chunk)
+			base64Writer.Close ()
+			gltfFile.write (jsonAfter)
+
+CorpusGeneratorVersion = 3
+CorpusShapes = ['icosphere', 'grid', 'torus']
+CorpusPrecision = 6
+CorpusFormats = {
+	'obj' : ('obj', lambda filePath, mesh : WriteObjFile (filePath, mesh, CorpusPrecision)),
+	'stl_ascii' : ('stl', lambda filePath, mesh : WriteAsciiStlFile (filePath, mesh, CorpusPrecision)),
+	'stl_binary' : ('stl', WriteBinaryStlFile),
+	'ply_ascii' : ('ply', lambda filePath, mesh : WriteAsciiPlyFile (filePath, mesh, CorpusPrecision)),
+	'ply_binary' : ('ply', WriteBinaryPlyFile),
+	'off' : ('off', lambda filePath, mesh : WriteOffFile (filePath, mesh, CorpusPrecision)),
+	'gltf' : ('gltf', lambda filePath, mesh : WriteGltfFile (filePath, mesh, False)),
+	'glb' : ('glb', lambda filePath, mesh : WriteGltfFile (filePath, mesh, True))
+}
+
+def GetCorpusFixtures (triangleCounts, shapes, formats, noise):
+	fixtures = []
+	for triangleCount in triangleCounts:
+		for shape in shapes:
+			for format in formats:
+				fixtures.append ({
+					'shape' : shape,
+					'triangles' : triangleCount,
+					'format' : format,
+					'noise' : noise
+				})
+	return fixtures
+
+def GetCorpusFixturesFromFile (corpusFilePath):
+	fixtures = []
+	with open (corpusFilePath) as corpusFile:
+		corpus = json.load (corpusFile)
+	for group in corpus['groups']:
+		formats = group['formats'] if 'formats' in group else list (CorpusFormats.keys ())
+		noise = group['noise'] if 'noise' in group else 0.0
+		fixtures.extend (GetCorpusFixtures (group['triangles'], group['shapes'], formats, noise))
+	return fixtures
+
+def GetParametersHash (parameters):
+	hashSource = json.dumps (parameters, sort_keys = True)
+	return hashlib.sha256 (hashSource.encode ('utf-8')).hexdigest ()
+
+def GetFixtureKey (fixture):
+	return GetParametersHash ({
+		'version' : CorpusGeneratorVersion,
+		'fixture' : fixture
+	})
+
+def GetFixtureFileName (fixture):
+	extension = CorpusFormats[fixture['format']][0]
+	fileName = '{0}_{1}_{2}'.format (fixture['shape'], fixture['triangles'], fixture['format'])
+	if fixture['noise'] > 0.0:
+		fileName += '_noise{0}'.format (fixture['noise'])
+	return fileName + '.' + extension
+
+def GenerateCorpusMesh (targetDir, shape, triangleCount, noise, formats):
+	# runs in a worker process, the seed depends only on the mesh parameters,
+	# so the generated files are byte-identical across runs
+	mesh = GenerateMeshForTriangleCount (shape, triangleCount)
+	if noise > 0.0:
+		seed = int (GetParametersHash ([shape, triangleCount, noise])[:16], 16)
+		mesh.SetNoise (noise, seed)
+	fileSizes = {}
+	for format, fileName in formats:
+		filePath = os.path.join (targetDir, fileName)
+		CorpusFormats[format][1] (filePath, mesh)
+		fileSizes[fileName] = os.path.getsize (filePath)
+	return fileSizes
+
+def GenerateCorpus (targetDir, fixtures, workerCount):
+	if not os.path.exists (targetDir):
+		os.makedirs (targetDir)
+
+	manifestPath = os.path.join (targetDir, 'corpus_manifest.json')
+	oldManifest = {}
+	if os.path.exists (manifestPath):
+		with open (manifestPath) as manifestFile:
+			oldManifest = json.load (manifestFile)
+
+	manifest = {}
+	meshTasks = {}
+	for fixture in fixtures:
+		fileName = GetFixtureFileName (fixture)
+		key = GetFixtureKey (fixture)
+		manifest[fileName] = {
+			'key' : key,
+			'parameters' : fixture
+		}
+		filePath = os.path.join (targetDir, fileName)
+		if fileName in oldManifest:
+			oldEntry = oldManifest[fileName]
+			if oldEntry['key'] == key and os.path.exists (filePath) and os.path.getsize (filePath) == oldEntry['size']:
+				manifest[fileName]['size'] = oldEntry['size']
+				continue
+		meshKey = (fixture['shape'], fixture['triangles'], fixture['noise'])
+		if not meshKey in meshTasks:
+			meshTasks[meshKey] = []
+		meshTasks[meshKey].append ((fixture['format'], fileName))
+
+	for fileName in oldManifest:
+		filePath = os.path.join (targetDir, fileName)
+		if not fileName in manifest and os.path.exists (filePath):
+			Tools.PrintInfo ('Remove ' + fileName + '.')
+			os.remove (filePath)
+
+	staleCount = sum (len (formats) for formats in meshTasks.values ())
+	Tools.PrintInfo ('{0} fixtures up to date, {1} to generate.'.format (len (manifest) - staleCount, staleCount))
+	if staleCount > 0:
+		with concurrent.futures.ProcessPoolExecutor (max_workers = workerCount) as executor:
+			futures = []
+			for meshKey, formats in meshTasks.items ():
+				futures.append (executor.submit (GenerateCorpusMesh, targetDir, meshKey[0], meshKey[1], meshKey[2], formats))
+			for future in concurrent.futures.as_completed (futures):
+				for fileName, fileSize in future.result ().items ():
+					Tools.PrintInfo ('Generated {0} ({1} bytes).'.format (fileName, fileSize))
+					manifest[fileName]['size'] = fileSize
+
+	with open (manifestPath, 'w') as manifestFile:
+		json.dump (manifest, manifestFile, indent = 4, sort_keys = True)
+
+def Main (argv):
+	workerCount = os.cpu_count ()
+	if len (argv) >= 4 and argv[1] == 'corpus':
+		# corpus <target dir> <triangle counts> [shapes] [formats], lists are comma separated
+		targetDir = os.path.abspath (argv[2])
+		triangleCounts = [int (count) for count in argv[3].split (',')]
+		shapes = argv[4].split (',') if len (argv) >= 5 else CorpusShapes
+		formats = argv[5].split (',') if len (argv) >= 6 else list (CorpusFormats.keys ())
+		GenerateCorpus (targetDir, GetCorpusFixtures (triangleCounts, shapes, formats, 0.0), workerCount)
+		return 0
+	elif len (argv) >= 4 and argv[1] == 'corpus_file':
+		# corpus_file <corpus json> <target dir>
+		fixtures = GetCorpusFixturesFromFile (os.path.abspath (argv[2]))
+		GenerateCorpus (os.path.abspath (argv[3]), fixtures, workerCount)
+		return 0
+
+	currentDir = os.path.dirname (os.path.abspath (__file__))
+	os.chdir (currentDir)
+
+	ow = ObjWriter ()
+	AddSolids (ow)
+
 	print (ow.GetContent ())
 	Tools.WriteContentToFile ('solids.obj', ow.GetContent ())
 	
 	return 0
 
-sys.exit (Main (sys.argv))
+if __name__ == '__main__':
+	sys.exit (Main (sys.argv))
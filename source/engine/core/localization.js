@@ -2,6 +2,7 @@ import { FormatString } from './core.js';
 
 let gLocalizedStrings = null;
 let gLanguageCode = null;
+let gLanguageStrings = null;
 
 export function SetLocalizedStrings (localizedStrings)
 {
@@ -13,15 +14,39 @@ export function SetLanguageCode (languageCode)
     gLanguageCode = languageCode;
 }
 
+export function SetLanguageStrings (languageStrings)
+{
+    gLanguageStrings = languageStrings;
+}
+
+function GetOwnString (strings, key)
+{
+    if (!Object.prototype.hasOwnProperty.call (strings, key)) {
+        return null;
+    }
+    return strings[key];
+}
+
 export function Loc (str)
 {
+    if (gLanguageStrings !== null) {
+        let languageString = GetOwnString (gLanguageStrings, str);
+        if (languageString) {
+            return languageString;
+        }
+    }
     if (gLocalizedStrings === null || gLanguageCode === null) {
         return str;
     }
-    if (!gLocalizedStrings[str] || !gLocalizedStrings[str][gLanguageCode]) {
+    let localizedString = GetOwnString (gLocalizedStrings, str);
+    if (!localizedString) {
+        return str;
+    }
+    let languageString = GetOwnString (localizedString, gLanguageCode);
+    if (!languageString) {
         return str;
     }
-    return gLocalizedStrings[str][gLanguageCode];
+    return languageString;
 }
 
 export function FLoc (str, ...args)
@@ -0,0 +1,207 @@
+import { IsDefined, ValueOrDefault, CopyObjectAttributes, IsObjectEmpty, FormatString, EscapeHtmlChars } from '../core/core.js';
+import { EventNotifier } from '../core/eventnotifier.js';
+import { SetLocalizedStrings, SetLanguageCode, SetLanguageStrings, Loc, FLoc } from '../core/localization.js';
+import { TaskRunner, RunTaskAsync, RunTasks, RunTasksBatch, WaitWhile } from '../core/taskrunner.js';
+import { Box3D, BoundingBoxCalculator3D } from '../geometry/box3d.js';
+import { Coord2D, CoordIsEqual2D, AddCoord2D, SubCoord2D, CoordDistance2D, DotVector2D } from '../geometry/coord2d.js';
+import { Coord3D, CoordIsEqual3D, AddCoord3D, SubCoord3D, CoordDistance3D, DotVector3D, VectorAngle3D, CrossVector3D, VectorLength3D, ArrayToCoord3D } from '../geometry/coord3d.js';
+import { Coord4D } from '../geometry/coord4d.js';
+import { IsZero, IsLower, IsGreater, IsLowerOrEqual, IsGreaterOrEqual, IsEqual, IsEqualEps, IsPositive, IsNegative, Eps, BigEps, RadDeg, DegRad, Direction } from '../geometry/geometry.js';
+import { Segment2D, ProjectPointToSegment2D, SegmentPointDistance2D } from '../geometry/line2d.js';
+import { Matrix, MatrixIsEqual } from '../geometry/matrix.js';
+import { OctreeNode, Octree } from '../geometry/octree.js';
+import { Quaternion, QuaternionIsEqual, ArrayToQuaternion, QuaternionFromAxisAngle, QuaternionFromXYZ } from '../geometry/quaternion.js';
+import { Transformation, TransformationIsEqual } from '../geometry/transformation.js';
+import { BezierTweenFunction, LinearTweenFunction, ParabolicTweenFunction, TweenCoord3D } from '../geometry/tween.js';
+import { BinaryReader } from '../io/binaryreader.js';
+import { BinaryWriter } from '../io/binarywriter.js';
+import { ArrayBufferToUtf8String, ArrayBufferToAsciiString, AsciiStringToArrayBuffer, Utf8StringToArrayBuffer, Base64DataURIToArrayBuffer, GetFileExtensionFromMimeType, CreateObjectUrl, CreateObjectUrlWithMimeType, RevokeObjectUrl } from '../io/bufferutils.js';
+import { LoadExternalLibraryFromUrl } from '../io/externallibs.js';
+import { GetFileName, GetFileExtension, RequestUrl, ReadFile, TransformFileHostUrls, IsUrl, FileSource, FileFormat } from '../io/fileutils.js';
+import { TextWriter } from '../io/textwriter.js';
+import { RGBColor, RGBAColor, ColorComponentFromFloat, ColorComponentToFloat, RGBColorFromFloatComponents, SRGBToLinear, LinearToSRGB, IntegerToHexString, RGBColorToHexString, RGBAColorToHexString, HexStringToRGBColor, HexStringToRGBAColor, ArrayToRGBColor, RGBColorIsEqual } from '../model/color.js';
+import { GeneratorParams, Generator, GeneratorHelper, GenerateCuboid, GenerateCone, GenerateCylinder, GenerateSphere, GeneratePlatonicSolid } from '../model/generator.js';
+import { Line } from '../model/line.js';
+import { TextureMap, MaterialBase, FaceMaterial, PhongMaterial, PhysicalMaterial, TextureMapIsEqual, TextureIsEqual, MaterialType, MaterialSource } from '../model/material.js';
+import { Mesh } from '../model/mesh.js';
+import { MeshPrimitiveBuffer, MeshBuffer, ConvertMeshToMeshBuffer } from '../model/meshbuffer.js';
+import { MeshInstanceId, MeshInstance } from '../model/meshinstance.js';
+import { IsEmptyMesh, CalculateTriangleNormal, TransformMesh, FlipMeshTrianglesOrientation } from '../model/meshutils.js';
+import { Model } from '../model/model.js';
+import { FinalizeModel, CheckModel } from '../model/modelfinalization.js';
+import { IsModelEmpty, GetBoundingBox, GetTopology, IsTwoManifold, GetDefaultMaterials, ReplaceDefaultMaterialsColor } from '../model/modelutils.js';
+import { Node } from '../model/node.js';
+import { Object3D, ModelObject3D } from '../model/object.js';
+import { Property, PropertyGroup, PropertyToString, PropertyType } from '../model/property.js';
+import { GetTriangleArea, GetTetrahedronSignedVolume, CalculateVolume, CalculateSurfaceArea } from '../model/quantities.js';
+import { TopologyVertex, TopologyEdge, TopologyTriangleEdge, TopologyTriangle, Topology } from '../model/topology.js';
+import { Triangle } from '../model/triangle.js';
+import { Unit } from '../model/unit.js';
+import { ParameterListBuilder, ParameterListParser, CreateUrlBuilder, CreateUrlParser, CreateModelUrlParameters, ParameterConverter } from '../parameters/parameterlist.js';
+
+export {
+    IsDefined,
+    ValueOrDefault,
+    CopyObjectAttributes,
+    IsObjectEmpty,
+    FormatString,
+    EscapeHtmlChars,
+    EventNotifier,
+    SetLocalizedStrings,
+    SetLanguageCode,
+    SetLanguageStrings,
+    Loc,
+    FLoc,
+    TaskRunner,
+    RunTaskAsync,
+    RunTasks,
+    RunTasksBatch,
+    WaitWhile,
+    Box3D,
+    BoundingBoxCalculator3D,
+    Coord2D,
+    CoordIsEqual2D,
+    AddCoord2D,
+    SubCoord2D,
+    CoordDistance2D,
+    DotVector2D,
+    Coord3D,
+    CoordIsEqual3D,
+    AddCoord3D,
+    SubCoord3D,
+    CoordDistance3D,
+    DotVector3D,
+    VectorAngle3D,
+    CrossVector3D,
+    VectorLength3D,
+    ArrayToCoord3D,
+    Coord4D,
+    IsZero,
+    IsLower,
+    IsGreater,
+    IsLowerOrEqual,
+    IsGreaterOrEqual,
+    IsEqual,
+    IsEqualEps,
+    IsPositive,
+    IsNegative,
+    Eps,
+    BigEps,
+    RadDeg,
+    DegRad,
+    Direction,
+    Segment2D,
+    ProjectPointToSegment2D,
+    SegmentPointDistance2D,
+    Matrix,
+    MatrixIsEqual,
+    OctreeNode,
+    Octree,
+    Quaternion,
+    QuaternionIsEqual,
+    ArrayToQuaternion,
+    QuaternionFromAxisAngle,
+    QuaternionFromXYZ,
+    Transformation,
+    TransformationIsEqual,
+    BezierTweenFunction,
+    LinearTweenFunction,
+    ParabolicTweenFunction,
+    TweenCoord3D,
+    BinaryReader,
+    BinaryWriter,
+    ArrayBufferToUtf8String,
+    ArrayBufferToAsciiString,
+    AsciiStringToArrayBuffer,
+    Utf8StringToArrayBuffer,
+    Base64DataURIToArrayBuffer,
+    GetFileExtensionFromMimeType,
+    CreateObjectUrl,
+    CreateObjectUrlWithMimeType,
+    RevokeObjectUrl,
+    LoadExternalLibraryFromUrl,
+    GetFileName,
+    GetFileExtension,
+    RequestUrl,
+    ReadFile,
+    TransformFileHostUrls,
+    IsUrl,
+    FileSource,
+    FileFormat,
+    TextWriter,
+    RGBColor,
+    RGBAColor,
+    ColorComponentFromFloat,
+    ColorComponentToFloat,
+    RGBColorFromFloatComponents,
+    SRGBToLinear,
+    LinearToSRGB,
+    IntegerToHexString,
+    RGBColorToHexString,
+    RGBAColorToHexString,
+    HexStringToRGBColor,
+    HexStringToRGBAColor,
+    ArrayToRGBColor,
+    RGBColorIsEqual,
+    GeneratorParams,
+    Generator,
+    GeneratorHelper,
+    GenerateCuboid,
+    GenerateCone,
+    GenerateCylinder,
+    GenerateSphere,
+    GeneratePlatonicSolid,
+    Line,
+    TextureMap,
+    MaterialBase,
+    FaceMaterial,
+    PhongMaterial,
+    PhysicalMaterial,
+    TextureMapIsEqual,
+    TextureIsEqual,
+    MaterialType,
+    MaterialSource,
+    Mesh,
+    MeshPrimitiveBuffer,
+    MeshBuffer,
+    ConvertMeshToMeshBuffer,
+    MeshInstanceId,
+    MeshInstance,
+    IsEmptyMesh,
+    CalculateTriangleNormal,
+    TransformMesh,
+    FlipMeshTrianglesOrientation,
+    Model,
+    FinalizeModel,
+    CheckModel,
+    IsModelEmpty,
+    GetBoundingBox,
+    GetTopology,
+    IsTwoManifold,
+    GetDefaultMaterials,
+    ReplaceDefaultMaterialsColor,
+    Node,
+    Object3D,
+    ModelObject3D,
+    Property,
+    PropertyGroup,
+    PropertyToString,
+    PropertyType,
+    GetTriangleArea,
+    GetTetrahedronSignedVolume,
+    CalculateVolume,
+    CalculateSurfaceArea,
+    TopologyVertex,
+    TopologyEdge,
+    TopologyTriangleEdge,
+    TopologyTriangle,
+    Topology,
+    Triangle,
+    Unit,
+    ParameterListBuilder,
+    ParameterListParser,
+    CreateUrlBuilder,
+    CreateUrlParser,
+    CreateModelUrlParameters,
+    ParameterConverter
+};
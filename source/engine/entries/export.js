@@ -0,0 +1,25 @@
+import { Exporter } from '../export/exporter.js';
+import { Exporter3dm } from '../export/exporter3dm.js';
+import { ExportedFile, ExporterBase } from '../export/exporterbase.js';
+import { ExporterBim } from '../export/exporterbim.js';
+import { ExporterGltf } from '../export/exportergltf.js';
+import { ExporterSettings, ExporterModel } from '../export/exportermodel.js';
+import { ExporterObj } from '../export/exporterobj.js';
+import { ExporterOff } from '../export/exporteroff.js';
+import { ExporterPly } from '../export/exporterply.js';
+import { ExporterStl } from '../export/exporterstl.js';
+
+export {
+    Exporter,
+    Exporter3dm,
+    ExportedFile,
+    ExporterBase,
+    ExporterBim,
+    ExporterGltf,
+    ExporterSettings,
+    ExporterModel,
+    ExporterObj,
+    ExporterOff,
+    ExporterPly,
+    ExporterStl
+};
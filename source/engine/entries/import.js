@@ -0,0 +1,28 @@
+import { ImportSettings, ImportError, ImportResult, ImporterFileAccessor, Importer, ImportErrorCode } from '../import/importer.js';
+import { ImporterBase } from '../import/importerbase.js';
+import { InputFile, ImporterFile, ImporterFileList, InputFilesFromUrls, InputFilesFromFileObjects } from '../import/importerfiles.js';
+import { ColorToMaterialConverter, NameFromLine, ParametersFromLine, ReadLines, IsPowerOfTwo, NextPowerOfTwo, UpdateMaterialTransparency, CreateOcctWorker, LoadExternalLibrary } from '../import/importerutils.js';
+
+export {
+    ImportSettings,
+    ImportError,
+    ImportResult,
+    ImporterFileAccessor,
+    Importer,
+    ImportErrorCode,
+    ImporterBase,
+    InputFile,
+    ImporterFile,
+    ImporterFileList,
+    InputFilesFromUrls,
+    InputFilesFromFileObjects,
+    ColorToMaterialConverter,
+    NameFromLine,
+    ParametersFromLine,
+    ReadLines,
+    IsPowerOfTwo,
+    NextPowerOfTwo,
+    UpdateMaterialTransparency,
+    CreateOcctWorker,
+    LoadExternalLibrary
+};
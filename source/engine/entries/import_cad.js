@@ -0,0 +1,13 @@
+import { Importer3dm } from '../import/importer3dm.js';
+import { ImporterBim } from '../import/importerbim.js';
+import { ImporterFcstd } from '../import/importerfcstd.js';
+import { ImporterIfc } from '../import/importerifc.js';
+import { ImporterOcct } from '../import/importerocct.js';
+
+export {
+    Importer3dm,
+    ImporterBim,
+    ImporterFcstd,
+    ImporterIfc,
+    ImporterOcct
+};
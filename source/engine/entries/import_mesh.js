@@ -0,0 +1,15 @@
+import { Importer3ds } from '../import/importer3ds.js';
+import { ImporterGltf } from '../import/importergltf.js';
+import { ImporterObj } from '../import/importerobj.js';
+import { ImporterOff } from '../import/importeroff.js';
+import { ImporterPly } from '../import/importerply.js';
+import { ImporterStl } from '../import/importerstl.js';
+
+export {
+    Importer3ds,
+    ImporterGltf,
+    ImporterObj,
+    ImporterOff,
+    ImporterPly,
+    ImporterStl
+};
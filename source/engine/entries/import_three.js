@@ -0,0 +1,12 @@
+import { ImporterThreeSvg } from '../import/importersvg.js';
+import { ImporterThreeBase, ImporterThreeFbx, ImporterThreeDae, ImporterThreeWrl, ImporterThree3mf, ImporterThreeAmf } from '../import/importerthree.js';
+
+export {
+    ImporterThreeSvg,
+    ImporterThreeBase,
+    ImporterThreeFbx,
+    ImporterThreeDae,
+    ImporterThreeWrl,
+    ImporterThree3mf,
+    ImporterThreeAmf
+};
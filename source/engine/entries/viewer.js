@@ -0,0 +1,81 @@
+import { ModelToThreeConversionParams, ModelToThreeConversionOutput, ThreeConversionStateHandler, ThreeNodeTree, ThreeMaterialHandler, ThreeMeshMaterialHandler, ConvertModelToThreeObject, MaterialGeometryType } from '../threejs/threeconverter.js';
+import { ThreeModelLoader } from '../threejs/threemodelloader.js';
+import { ThreeColorConverter, ThreeLinearToSRGBColorConverter, ThreeSRGBToLinearColorConverter, HasHighpDriverIssue, GetShadingType, ConvertThreeColorToColor, ConvertColorToThreeColor, ConvertThreeGeometryToMesh, CreateHighlightMaterial, CreateHighlightMaterials, DisposeThreeObjects, GetLineSegmentsProjectedDistance, ShadingType } from '../threejs/threeutils.js';
+import { Camera, CameraIsEqual3D, NavigationMode, ProjectionMode } from '../viewer/camera.js';
+import { GetIntegerFromStyle, GetDomElementExternalWidth, GetDomElementExternalHeight, GetDomElementInnerDimensions, GetDomElementClientCoordinates, CreateDomElement, AddDomElement, AddDiv, ClearDomElement, InsertDomElementBefore, InsertDomElementAfter, ShowDomElement, IsDomElementVisible, SetDomElementWidth, SetDomElementHeight, GetDomElementOuterWidth, GetDomElementOuterHeight, SetDomElementOuterWidth, SetDomElementOuterHeight, CreateDiv } from '../viewer/domutils.js';
+import { EmbeddedViewer, Init3DViewerFromUrlList, Init3DViewerFromFileList, Init3DViewerElements } from '../viewer/embeddedviewer.js';
+import { MouseInteraction, TouchInteraction, ClickDetector, Navigation, NavigationType } from '../viewer/navigation.js';
+import { EnvironmentSettings, ShadingModel } from '../viewer/shadingmodel.js';
+import { CameraValidator, UpVector, Viewer, GetDefaultCamera, TraverseThreeObject, GetShadingTypeOfObject } from '../viewer/viewer.js';
+import { ViewerModel, EdgeSettings, ViewerMainModel, SetThreeMeshPolygonOffset, IntersectionMode } from '../viewer/viewermodel.js';
+
+export {
+    ModelToThreeConversionParams,
+    ModelToThreeConversionOutput,
+    ThreeConversionStateHandler,
+    ThreeNodeTree,
+    ThreeMaterialHandler,
+    ThreeMeshMaterialHandler,
+    ConvertModelToThreeObject,
+    MaterialGeometryType,
+    ThreeModelLoader,
+    ThreeColorConverter,
+    ThreeLinearToSRGBColorConverter,
+    ThreeSRGBToLinearColorConverter,
+    HasHighpDriverIssue,
+    GetShadingType,
+    ConvertThreeColorToColor,
+    ConvertColorToThreeColor,
+    ConvertThreeGeometryToMesh,
+    CreateHighlightMaterial,
+    CreateHighlightMaterials,
+    DisposeThreeObjects,
+    GetLineSegmentsProjectedDistance,
+    ShadingType,
+    Camera,
+    CameraIsEqual3D,
+    NavigationMode,
+    ProjectionMode,
+    GetIntegerFromStyle,
+    GetDomElementExternalWidth,
+    GetDomElementExternalHeight,
+    GetDomElementInnerDimensions,
+    GetDomElementClientCoordinates,
+    CreateDomElement,
+    AddDomElement,
+    AddDiv,
+    ClearDomElement,
+    InsertDomElementBefore,
+    InsertDomElementAfter,
+    ShowDomElement,
+    IsDomElementVisible,
+    SetDomElementWidth,
+    SetDomElementHeight,
+    GetDomElementOuterWidth,
+    GetDomElementOuterHeight,
+    SetDomElementOuterWidth,
+    SetDomElementOuterHeight,
+    CreateDiv,
+    EmbeddedViewer,
+    Init3DViewerFromUrlList,
+    Init3DViewerFromFileList,
+    Init3DViewerElements,
+    MouseInteraction,
+    TouchInteraction,
+    ClickDetector,
+    Navigation,
+    NavigationType,
+    EnvironmentSettings,
+    ShadingModel,
+    CameraValidator,
+    UpVector,
+    Viewer,
+    GetDefaultCamera,
+    TraverseThreeObject,
+    GetShadingTypeOfObject,
+    ViewerModel,
+    EdgeSettings,
+    ViewerMainModel,
+    SetThreeMeshPolygonOffset,
+    IntersectionMode
+};
@@ -1,6 +1,6 @@
 import { IsDefined, ValueOrDefault, CopyObjectAttributes, IsObjectEmpty, FormatString, EscapeHtmlChars } from './core/core.js';
 import { EventNotifier } from './core/eventnotifier.js';
-import { SetLocalizedStrings, SetLanguageCode, Loc, FLoc } from './core/localization.js';
+import { SetLocalizedStrings, SetLanguageCode, SetLanguageStrings, Loc, FLoc } from './core/localization.js';
 import { TaskRunner, RunTaskAsync, RunTasks, RunTasksBatch, WaitWhile } from './core/taskrunner.js';
 import { Exporter } from './export/exporter.js';
 import { Exporter3dm } from './export/exporter3dm.js';
@@ -86,6 +86,7 @@ export {
     EventNotifier,
     SetLocalizedStrings,
     SetLanguageCode,
+    SetLanguageStrings,
     Loc,
     FLoc,
     TaskRunner,
@@ -0,0 +1,44 @@
+import { SetLanguageCode, SetLanguageStrings } from '../engine/core/localization.js';
+import { RequestUrl } from '../engine/io/fileutils.js';
+import { ArrayBufferToUtf8String } from '../engine/io/bufferutils.js';
+
+// language files are generated next to the website bundle, so their location
+// is calculated from the url of the currently running script
+const LanguageFolderUrl = (document.currentScript ? new URL ('localization/', document.currentScript.src).href : null);
+
+let gLanguageCode = null;
+
+function RequestJson (url)
+{
+    return RequestUrl (url, () => {}).then ((buffer) => {
+        return JSON.parse (ArrayBufferToUtf8String (buffer));
+    });
+}
+
+export function SetWebsiteLanguage (languageCode)
+{
+    gLanguageCode = languageCode;
+}
+
+export function LoadWebsiteLanguage (onReady)
+{
+    if (gLanguageCode === null || LanguageFolderUrl === null) {
+        onReady ();
+        return;
+    }
+
+    RequestJson (LanguageFolderUrl + 'languages.json').then ((languages) => {
+        if (!Object.prototype.hasOwnProperty.call (languages, gLanguageCode)) {
+            return null;
+        }
+        return RequestJson (LanguageFolderUrl + languages[gLanguageCode]);
+    }).then ((languageStrings) => {
+        if (languageStrings !== null) {
+            SetLanguageStrings (languageStrings);
+            SetLanguageCode (gLanguageCode);
+        }
+        onReady ();
+    }).catch (() => {
+        onReady ();
+    });
+}
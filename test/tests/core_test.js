@@ -97,6 +97,43 @@ describe ('Core', function () {
         OV.SetLocalizedStrings (null);
         OV.SetLanguageCode (null);
     });
+
+    it ('Language strings', function () {
+        OV.SetLanguageStrings ({
+            'Test' : 'Teszt',
+            'Test {0}' : 'Teszt {0}'
+        });
+        assert.strictEqual (OV.Loc ('Test'), 'Teszt');
+        assert.strictEqual (OV.FLoc ('Test {0}', 'a'), 'Teszt a');
+        assert.strictEqual (OV.Loc ('Other'), 'Other');
+
+        OV.SetLanguageStrings (null);
+        assert.strictEqual (OV.Loc ('Test'), 'Test');
+    });
+
+    it ('Localization of object prototype names', function () {
+        OV.SetLanguageStrings ({
+            'Test' : 'Teszt'
+        });
+        assert.strictEqual (OV.Loc ('constructor'), 'constructor');
+        assert.strictEqual (OV.Loc ('toString'), 'toString');
+        assert.strictEqual (OV.FLoc ('hasOwnProperty'), 'hasOwnProperty');
+        OV.SetLanguageStrings (null);
+
+        OV.SetLocalizedStrings ({
+            'Test' : {
+                'hu' : 'Teszt'
+            }
+        });
+        OV.SetLanguageCode ('hu');
+        assert.strictEqual (OV.Loc ('constructor'), 'constructor');
+        assert.strictEqual (OV.Loc ('toString'), 'toString');
+        OV.SetLanguageCode ('constructor');
+        assert.strictEqual (OV.Loc ('Test'), 'Test');
+
+        OV.SetLocalizedStrings (null);
+        OV.SetLanguageCode (null);
+    });
 });
 
 }
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import tempfile
+
+from lib.html_generator import HtmlGenerator
+from lib.doc_entities import ParameterDoc, ReturnsDoc, FunctionDoc, ClassDoc
+from lib.doc_utils import LinkResolver, FunctionType, GenerateFunctionHtml
+
+def CreateSyntheticClass (methodCount):
+    classDoc = ClassDoc ('SyntheticClass', 'Synthetic class with {0} methods.'.format (methodCount))
+    classDoc.SetConstructor (FunctionDoc ('SyntheticClass', 'Creates the class.', [], None))
+    for i in range (0, methodCount):
+        parameters = [
+            ParameterDoc ('first', ['number'], False, 'The first parameter of method {0}.'.format (i)),
+            ParameterDoc ('second', ['string', 'null'], True, 'The second parameter, see {@link SyntheticClass}.')
+        ]
+        returns = ReturnsDoc (['Array.<SyntheticClass>'], 'The result of method {0}.'.format (i))
+        classDoc.AddFunction (FunctionDoc ('Method' + str (i), 'Description of method {0}.'.format (i), parameters, returns))
+    return classDoc
+
+def MeasureTime (function):
+    startTime = time.perf_counter ()
+    function ()
+    return time.perf_counter () - startTime
+
+def StreamClassToFile (classDoc, linkResolver, filePath):
+    with open (filePath, 'w', encoding = 'utf-8') as file:
+        generator = HtmlGenerator ('\n', file)
+        for function in classDoc.functions:
+            GenerateFunctionHtml (function, generator, linkResolver, FunctionType.ClassMethod)
+
+def Main (argv):
+    methodCounts = [1000, 2000, 4000, 8000, 16000]
+    if len (argv) > 1:
+        methodCounts = [int (count) for count in argv[1].split (',')]
+
+    linkResolver = LinkResolver ({
+        'SyntheticClass' : 'Class_SyntheticClass.html'
+    })
+    tempDir = tempfile.mkdtemp ()
+    tempFilePath = os.path.join (tempDir, 'Class_SyntheticClass.html')
+
+    print ('{0:>8} {1:>12} {2:>12} {3:>14}'.format ('methods', 'buffer ms', 'stream ms', 'us / method'))
+    for methodCount in methodCounts:
+        classDoc = CreateSyntheticClass (methodCount)
+        bufferTime = MeasureTime (lambda : classDoc.GetHtml (linkResolver, '\n'))
+        streamTime = MeasureTime (lambda : StreamClassToFile (classDoc, linkResolver, tempFilePath))
+        print ('{0:>8} {1:>12.1f} {2:>12.1f} {3:>14.2f}'.format (
+            methodCount,
+            bufferTime * 1000.0,
+            streamTime * 1000.0,
+            bufferTime * 1000000.0 / methodCount
+        ))
+
+    os.remove (tempFilePath)
+    os.rmdir (tempDir)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit (Main (sys.argv))
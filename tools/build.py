@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import concurrent.futures
+
+from lib import utils as Utils
+
+StampCacheVersion = 2
+
+class BuildStep:
+	def __init__ (self, name, commands, inputs, outputs, onDemand = False):
+		# on demand steps run only when they are requested by name, but they
+		# are still ordered before the steps reading their outputs
+		self.name = name
+		self.commands = commands
+		self.inputs = inputs
+		self.outputs = outputs
+		self.onDemand = onDemand
+		self.dependencies = []
+
+	def DependsOn (self, other):
+		# a step depends on another one if it reads anything the other writes
+		for inputPath in self.inputs:
+			for outputPath in other.outputs:
+				if IsSubPath (outputPath, inputPath) or IsSubPath (inputPath, outputPath):
+					return True
+		return False
+
+def IsSubPath (path, parentPath):
+	return path == parentPath or path.startswith (parentPath + '/')
+
+def GetBuildSteps (testBuild):
+	python = sys.executable
+	packageArguments = ['test'] if testBuild else []
+	packageDir = 'build/package_test' if testBuild else 'build/package'
+	engineFiles = ['source/engine/main.js', 'source/engine/entries', 'build/engine/entries_report.json']
+	return [
+		BuildStep (
+			'update_engine_exports',
+			[[python, 'tools/update_engine_exports.py']],
+			['source/engine', 'tools/update_engine_exports.py', 'tools/lib'],
+			engineFiles
+		),
+		BuildStep (
+			'generate_docs',
+			[[python, 'tools/generate_docs.py']],
+			['source/engine', 'docs/source', 'tools/jsdoc.json', 'tools/generate_docs.py', 'tools/lib'],
+			['docs/index.html', 'docs/search_index.json']
+		),
+		BuildStep (
+			'generate_icon_font',
+			[[python, 'tools/generate_icon_font.py']],
+			['assets/icons', 'source/website', 'website/index.html', 'website/embed.html', 'website/info/index.html', 'website/info/faq.html', 'website/info/cookies.html', 'website/info/js', 'plugins', 'tools/generate_icon_font.py'],
+			['source/website/css/icons.css', 'source/website/css/O3DVIcons/O3DVIcons.woff', 'website/info/css/icons.css', 'website/info/css/O3DVIcons.woff'],
+			onDemand = True
+		),
+		BuildStep (
+			'build_engine',
+			[['esbuild', 'source/engine/main.js', '--bundle', '--minify', '--global-name=OV', '--metafile=build/meta/o3dv.min.json', '--outfile=build/engine/o3dv.min.js']],
+			['source/engine', 'package.json'],
+			['build/engine/o3dv.min.js', 'build/meta/o3dv.min.json']
+		),
+		BuildStep (
+			# the entry modules are generated by update_engine_exports, esbuild
+			# expands the pattern itself, so new entries need no change here
+			'build_engine_entries',
+			[['esbuild', 'source/engine/entries/*.js', '--bundle', '--minify', '--splitting', '--format=esm', '--outdir=build/engine/entries']],
+			['source/engine', 'package.json'],
+			['build/engine/entries']
+		),
+		BuildStep (
+			'build_engine_module',
+			[['rollup', '--config', 'tools/rollup.js'], ['tsc', '--project', 'tools/tsconfig.json']],
+			['source/engine', 'tools/rollup.js', 'tools/tsconfig.json', 'package.json'],
+			['build/engine/o3dv.module.js', 'build/engine/o3dv.module.d.ts']
+		),
+		BuildStep (
+			'build_website',
+			[['esbuild', 'source/website/index.js', '--bundle', '--minify', '--global-name=OV', '--loader:.ttf=file', '--loader:.woff=file', '--loader:.svg=file', '--metafile=build/meta/o3dv.website.min.json', '--outfile=build/website/o3dv.website.min.js']],
+			['source/website', 'source/engine', 'package.json'],
+			['build/website/o3dv.website.min.js', 'build/website/o3dv.website.min.css', 'build/meta/o3dv.website.min.json']
+		),
+		BuildStep (
+			'build_localization',
+			[[python, 'tools/collect_localized_strings.py', 'bundle']],
+			['source', 'plugins', 'tools/collect_localized_strings.py'],
+			['build/website/localization', 'build/localization']
+		),
+		BuildStep (
+			'check_bundle_sizes',
+			[[python, 'tools/check_bundle_sizes.py']],
+			['build/engine/o3dv.min.js', 'build/engine/o3dv.module.js', 'build/website/o3dv.website.min.js', 'build/website/o3dv.website.min.css', 'build/meta', 'tools/bundle_budgets.json', 'tools/check_bundle_sizes.py', 'tools/lib'],
+			['build/bundle_sizes.json']
+		),
+		BuildStep (
+			'create_package',
+			[[python, 'tools/create_package.py'] + packageArguments],
+			['build/engine/o3dv.min.js', 'build/website', 'build/bundle_sizes.json', 'website', 'plugins', 'package.json', 'LICENSE.md', 'tools/create_package.py', 'tools/lib'],
+			[packageDir]
+		)
+	]
+
+def ResolveDependencies (steps):
+	# only the earlier steps are considered, so the order of the list decides
+	# the direction when two steps read each others outputs
+	for i in range (0, len (steps)):
+		for j in range (0, i):
+			if steps[i].DependsOn (steps[j]):
+				steps[i].dependencies.append (steps[j])
+
+def SelectSteps (steps, targetNames):
+	stepsByName = {step.name : step for step in steps}
+	selected = set ()
+	def AddStep (step):
+		if step.name in selected:
+			return
+		selected.add (step.name)
+		for dependency in step.dependencies:
+			if not dependency.onDemand or dependency.name in targetNames:
+				AddStep (dependency)
+	for targetName in targetNames:
+		if not targetName in stepsByName:
+			return None
+		AddStep (stepsByName[targetName])
+	return [step for step in steps if step.name in selected]
+
+def GetInputFilePaths (step):
+	filePaths = []
+	for inputPath in step.inputs:
+		if os.path.isfile (inputPath):
+			filePaths.append (inputPath)
+			continue
+		for folder, subFolders, fileNames in os.walk (inputPath):
+			subFolders[:] = [subFolder for subFolder in subFolders if subFolder != '__pycache__']
+			for fileName in fileNames:
+				filePaths.append (os.path.join (folder, fileName).replace (os.sep, '/'))
+	# outputs of the step inside its own inputs are not inputs
+	return sorted ([filePath for filePath in filePaths if not any (IsSubPath (filePath, outputPath) for outputPath in step.outputs)])
+
+class FileHashCache:
+	def __init__ (self, entries):
+		self.entries = entries
+
+	def GetHash (self, filePath):
+		# hashes are reused while the size and the modification time match
+		stat = os.stat (filePath)
+		key = [stat.st_size, stat.st_mtime_ns]
+		if filePath in self.entries and self.entries[filePath][0] == key:
+			return self.entries[filePath][1]
+		fileHash = Utils.GetFileHash (filePath)
+		self.entries[filePath] = [key, fileHash]
+		return fileHash
+
+def GetStepStamp (step, fileHashCache):
+	hasher = hashlib.sha256 ()
+	hasher.update (json.dumps ([command[1:] for command in step.commands]).encode ('utf-8'))
+	for filePath in GetInputFilePaths (step):
+		hasher.update (filePath.encode ('utf-8'))
+		hasher.update (fileHashCache.GetHash (filePath).encode ('utf-8'))
+	return hasher.hexdigest ()
+
+def RunStep (step):
+	with Utils.ProfileStep (step.name):
+		return RunStepCommands (step)
+
+def RunStepCommands (step):
+	startTime = time.perf_counter ()
+	outputs = []
+	for command in step.commands:
+		exitCode, output = Utils.RunCommandWithOutput (command[0], command[1:])
+		outputs.append (output)
+		if exitCode != 0:
+			return exitCode, ''.join (outputs), time.perf_counter () - startTime
+	return 0, ''.join (outputs), time.perf_counter () - startTime
+
+def GetWarnings (output):
+	# the tools report problems that do not fail the build as warning lines,
+	# they are collected, so they are not lost in the output of the build
+	return [line[len ('WARNING: '):] for line in output.splitlines () if line.startswith ('WARNING: ')]
+
+def PrintStepResult (step, status, output):
+	Utils.PrintInfo ('[{0}] {1}'.format (step.name, status))
+	output = output.rstrip ()
+	if len (output) > 0:
+		print (output)
+
+def RunSteps (steps, stamps, fileHashCache, forceBuild, jobCount, warnings):
+	# a step starts when all of its dependencies are finished, and it is
+	# skipped if its inputs and commands are the same as in the last build
+	stepNames = set ([step.name for step in steps])
+	finished = set ()
+	failed = set ()
+	pending = list (steps)
+	running = {}
+	with concurrent.futures.ThreadPoolExecutor (max_workers = jobCount) as executor:
+		while len (pending) > 0 or len (running) > 0:
+			for step in list (pending):
+				dependencies = [dependency for dependency in step.dependencies if dependency.name in stepNames]
+				if any (dependency.name in failed for dependency in dependencies):
+					pending.remove (step)
+					failed.add (step.name)
+					PrintStepResult (step, 'not started, a dependency failed', '')
+					continue
+				if not all (dependency.name in finished for dependency in dependencies):
+					continue
+				pending.remove (step)
+				# some outputs are created only in certain cases, so the outputs
+				# existing after the last run are checked instead of all of them
+				stamp = GetStepStamp (step, fileHashCache)
+				oldStamp = stamps[step.name] if step.name in stamps else None
+				if not forceBuild and oldStamp != None and oldStamp['hash'] == stamp and all (os.path.exists (outputPath) for outputPath in oldStamp['outputs']):
+					finished.add (step.name)
+					PrintStepResult (step, 'skipped, inputs unchanged', '')
+					# the warnings of the last run are still valid for the same inputs
+					for warning in (oldStamp['warnings'] if 'warnings' in oldStamp else []):
+						Utils.PrintWarning (warning)
+						warnings.append ((step.name, warning))
+					continue
+				running[executor.submit (RunStep, step)] = (step, stamp)
+			if len (running) == 0:
+				continue
+			done, notDone = concurrent.futures.wait (running.keys (), return_when = concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				step, stamp = running.pop (future)
+				exitCode, output, stepTime = future.result ()
+				if exitCode != 0:
+					failed.add (step.name)
+					stamps.pop (step.name, None)
+					PrintStepResult (step, 'failed with exit code {0} after {1:.1f} s'.format (exitCode, stepTime), output)
+				else:
+					finished.add (step.name)
+					stepWarnings = GetWarnings (output)
+					stamps[step.name] = {
+						'hash' : stamp,
+						'outputs' : [outputPath for outputPath in step.outputs if os.path.exists (outputPath)],
+						'warnings' : stepWarnings
+					}
+					PrintStepResult (step, 'finished in {0:.1f} s'.format (stepTime), output)
+					warnings.extend ((step.name, warning) for warning in stepWarnings)
+	return len (failed) == 0
+
+def Main (argv):
+	toolsDir = os.path.dirname (os.path.abspath (__file__))
+	rootDir = os.path.dirname (toolsDir)
+	os.chdir (rootDir)
+
+	testBuild = 'test' in argv[1:]
+	forceBuild = 'force' in argv[1:]
+	# the steps inherit the environment, so every tool of the build writes
+	# its own profile next to the one of the build
+	if 'profile' in argv[1:]:
+		os.environ[Utils.ProfileEnvironmentVariable] = '1'
+	Utils.StartProfiling ('build')
+	jobCount = os.cpu_count () or 1
+	targetNames = []
+	for arg in argv[1:]:
+		if arg.startswith ('jobs='):
+			jobCount = int (arg[len ('jobs='):])
+		elif arg not in ['test', 'force', 'profile']:
+			targetNames.append (arg)
+	if len (targetNames) == 0:
+		targetNames = ['create_package', 'generate_docs', 'build_engine_module', 'build_engine_entries']
+
+	# the tools installed by npm are found even if the script is not started
+	# from an npm script
+	nodeBinDir = os.path.join (rootDir, 'node_modules', '.bin')
+	if os.path.exists (nodeBinDir):
+		os.environ['PATH'] = nodeBinDir + os.pathsep + os.environ['PATH']
+
+	steps = GetBuildSteps (testBuild)
+	ResolveDependencies (steps)
+	selectedSteps = SelectSteps (steps, targetNames)
+	if selectedSteps == None:
+		Utils.PrintError ('Unknown build step, available steps: ' + ', '.join (step.name for step in steps))
+		return 1
+
+	cachePath = os.path.join ('build', 'cache', 'build_steps.json')
+	cache = {}
+	if os.path.exists (cachePath):
+		with open (cachePath) as cacheFile:
+			cache = json.load (cacheFile)
+	if not 'version' in cache or cache['version'] != StampCacheVersion:
+		cache = { 'stamps' : {}, 'files' : {} }
+
+	startTime = time.perf_counter ()
+	fileHashCache = FileHashCache (cache['files'])
+	warnings = []
+	success = RunSteps (selectedSteps, cache['stamps'], fileHashCache, forceBuild, jobCount, warnings)
+
+	cacheDir = os.path.dirname (cachePath)
+	if not os.path.exists (cacheDir):
+		os.makedirs (cacheDir)
+	with open (cachePath, 'w') as cacheFile:
+		json.dump ({
+			'version' : StampCacheVersion,
+			'stamps' : cache['stamps'],
+			'files' : fileHashCache.entries
+		}, cacheFile)
+
+	if len (warnings) > 0:
+		Utils.PrintWarning ('{0} warning(s) in the build:'.format (len (warnings)))
+		for stepName, warning in warnings:
+			Utils.PrintWarning ('[{0}] {1}'.format (stepName, warning))
+	Utils.PrintInfo ('Build {0} in {1:.1f} s.'.format ('finished' if success else 'failed', time.perf_counter () - startTime))
+	return 0 if success else 1
+
+sys.exit (Main (sys.argv))
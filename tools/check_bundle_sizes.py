@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import gzip
+import math
+import time
+
+from lib import utils as Utils
+
+HistoryVersion = 1
+DefaultBudgetMargin = 0.05
+BudgetsPath = os.path.join ('tools', 'bundle_budgets.json')
+ReportPath = os.path.join ('build', 'bundle_sizes.json')
+HistoryPath = os.path.join ('build', 'bundle_size_history.jsonl')
+
+# the bundles built by esbuild have a metafile listing the bytes every input
+# file contributes to them, the module is built by rollup, so only its total
+# size is known
+Bundles = [
+	('build/engine/o3dv.min.js', 'build/meta/o3dv.min.json'),
+	('build/engine/o3dv.module.js', None),
+	('build/website/o3dv.website.min.js', 'build/meta/o3dv.website.min.json'),
+	('build/website/o3dv.website.min.css', 'build/meta/o3dv.website.min.json')
+]
+
+def LoadJsonFile (filePath):
+	if not os.path.exists (filePath):
+		return None
+	with open (filePath) as jsonFile:
+		return json.load (jsonFile)
+
+def GetInputGroup (inputPath):
+	# engine files are grouped by subsystem, third-party files by package
+	parts = inputPath.replace ('\\', '/').split ('/')
+	if 'node_modules' in parts:
+		index = len (parts) - 1 - parts[::-1].index ('node_modules')
+		if index + 1 >= len (parts):
+			return 'other'
+		packageName = parts[index + 1]
+		if packageName.startswith ('@') and index + 2 < len (parts):
+			packageName += '/' + parts[index + 2]
+		return 'npm:' + packageName
+	if len (parts) > 3 and parts[0] == 'source' and parts[1] == 'engine':
+		return 'engine/' + parts[2]
+	if len (parts) > 2 and parts[0] == 'source':
+		return parts[1]
+	return 'other'
+
+def GetInputGroups (metafile, bundlePath):
+	if metafile == None or not bundlePath in metafile['outputs']:
+		return None
+	groups = {}
+	inputs = metafile['outputs'][bundlePath]['inputs']
+	for inputPath in inputs:
+		groupName = GetInputGroup (inputPath)
+		groups[groupName] = groups.get (groupName, 0) + inputs[inputPath]['bytesInOutput']
+	return groups
+
+def MeasureBundle (bundlePath, metafilePath):
+	with open (bundlePath, 'rb') as bundleFile:
+		content = bundleFile.read ()
+	rawSize = len (content)
+	gzipSize = len (gzip.compress (content, compresslevel = 9, mtime = 0))
+	result = {
+		'raw' : rawSize,
+		'gzip' : gzipSize,
+		'groups' : {}
+	}
+	groups = GetInputGroups (LoadJsonFile (metafilePath) if metafilePath != None else None, bundlePath)
+	if groups == None:
+		return result
+	# the minified output can't be split by input, so the gzip size of the
+	# groups is estimated from their share of the raw size
+	for groupName, groupSize in groups.items ():
+		groupGzipSize = round (gzipSize * groupSize / rawSize) if rawSize > 0 else 0
+		result['groups'][groupName] = [groupSize, groupGzipSize]
+	return result
+
+def GetBudget (baseline, margin):
+	# the budget file stores the sizes measured by a real build, the budget
+	# is these sizes plus the margin of the file
+	if baseline == None:
+		return None
+	return { key : int (math.ceil (baseline[key] * (1.0 + margin))) for key in ['raw', 'gzip'] if key in baseline }
+
+def SaveBudgets (budgetsPath, margin, bundles):
+	baselines = {}
+	for bundlePath, bundle in bundles.items ():
+		baselines[bundlePath] = {
+			'raw' : bundle['raw'],
+			'gzip' : bundle['gzip']
+		}
+	with open (budgetsPath, 'w') as budgetsFile:
+		json.dump ({
+			'margin' : margin,
+			'measured' : time.strftime ('%Y-%m-%dT%H:%M:%S'),
+			'bundles' : baselines
+		}, budgetsFile, indent = '\t', sort_keys = True)
+		budgetsFile.write ('\n')
+
+def FormatSize (size):
+	return '{0:.1f} KB'.format (size / 1024.0)
+
+def FormatDelta (size, oldSize):
+	if oldSize == None:
+		return 'new'
+	delta = size - oldSize
+	if delta == 0:
+		return '='
+	return '{0}{1:.1f} KB'.format ('+' if delta > 0 else '-', abs (delta) / 1024.0)
+
+def PrintBundle (bundlePath, bundle, oldBundle, budget):
+	line = '{0}: {1} raw ({2}), {3} gzip ({4})'.format (
+		bundlePath,
+		FormatSize (bundle['raw']),
+		FormatDelta (bundle['raw'], oldBundle['raw'] if oldBundle != None else None),
+		FormatSize (bundle['gzip']),
+		FormatDelta (bundle['gzip'], oldBundle['gzip'] if oldBundle != None else None)
+	)
+	if budget != None:
+		line += ', budget ' + ', '.join ('{0} {1}'.format (FormatSize (budget[key]), key) for key in ['raw', 'gzip'] if key in budget)
+	Utils.PrintInfo (line)
+
+	oldGroups = oldBundle['groups'] if oldBundle != None else {}
+	groups = bundle['groups']
+	for groupName in sorted (groups.keys (), key = lambda x : -groups[x][0]):
+		oldGroup = oldGroups[groupName] if groupName in oldGroups else None
+		Utils.PrintInfo ('  {0:<24} {1:>10} raw {2:>10} {3:>10} gzip (est.)'.format (
+			groupName,
+			FormatSize (groups[groupName][0]),
+			FormatDelta (groups[groupName][0], oldGroup[0] if oldGroup != None else None),
+			FormatSize (groups[groupName][1])
+		))
+	for groupName in sorted (oldGroups.keys ()):
+		if not groupName in groups:
+			Utils.PrintInfo ('  {0:<24} removed ({1} raw)'.format (groupName, FormatSize (oldGroups[groupName][0])))
+
+def GetBudgetErrors (bundlePath, bundle, budget):
+	errors = []
+	if budget == None:
+		return errors
+	for key in ['raw', 'gzip']:
+		if key in budget and bundle[key] > budget[key]:
+			errors.append ('{0}: {1} size {2} exceeds the budget of {3} by {4} bytes.'.format (
+				bundlePath,
+				key,
+				bundle[key],
+				budget[key],
+				bundle[key] - budget[key]
+			))
+	return errors
+
+def LoadLastHistoryEntry (historyPath):
+	if not os.path.exists (historyPath):
+		return None
+	lastEntry = None
+	with open (historyPath) as historyFile:
+		for line in historyFile:
+			if len (line.strip ()) == 0:
+				continue
+			entry = json.loads (line)
+			if entry['version'] == HistoryVersion:
+				lastEntry = entry
+	return lastEntry
+
+def AppendHistoryEntry (historyPath, entry):
+	historyDir = os.path.dirname (historyPath)
+	if not os.path.exists (historyDir):
+		os.makedirs (historyDir)
+	with open (historyPath, 'a') as historyFile:
+		historyFile.write (json.dumps (entry, sort_keys = True) + '\n')
+
+def Main (argv):
+	toolsDir = os.path.dirname (os.path.abspath (__file__))
+	rootDir = os.path.dirname (toolsDir)
+	os.chdir (rootDir)
+
+	# update_budgets records the sizes of the current bundles as the new
+	# baseline, it should be run on the output of a real release build
+	budgetsPath = BudgetsPath
+	updateBudgets = False
+	for arg in argv[1:]:
+		if arg.startswith ('budgets='):
+			budgetsPath = arg[len ('budgets='):]
+		elif arg == 'update_budgets':
+			updateBudgets = True
+	budgets = LoadJsonFile (budgetsPath)
+	if budgets == None:
+		Utils.PrintError ('Budget file not found: ' + budgetsPath)
+		return 1
+	margin = budgets['margin'] if 'margin' in budgets else DefaultBudgetMargin
+	baselines = budgets['bundles'] if 'bundles' in budgets else {}
+
+	bundles = {}
+	for bundlePath, metafilePath in Bundles:
+		if not os.path.exists (bundlePath):
+			Utils.PrintInfo ('Bundle not found, skipping: ' + bundlePath)
+			continue
+		if metafilePath != None and not os.path.exists (metafilePath):
+			Utils.PrintInfo ('Metafile not found, reporting total size only: ' + metafilePath)
+			metafilePath = None
+		bundles[bundlePath] = MeasureBundle (bundlePath, metafilePath)
+
+	if updateBudgets:
+		SaveBudgets (budgetsPath, margin, bundles)
+		Utils.PrintInfo ('Budgets updated from {0} bundle(s) with a margin of {1:.0f}%.'.format (len (bundles), margin * 100.0))
+		return 0
+
+	# the sizes are compared to the last recorded run, and a new run is
+	# recorded only when a size changed
+	lastEntry = LoadLastHistoryEntry (HistoryPath)
+	oldBundles = lastEntry['bundles'] if lastEntry != None else {}
+	errors = []
+	warnings = []
+	for bundlePath in bundles:
+		oldBundle = oldBundles[bundlePath] if bundlePath in oldBundles else None
+		budget = GetBudget (baselines[bundlePath] if bundlePath in baselines else None, margin)
+		PrintBundle (bundlePath, bundles[bundlePath], oldBundle, budget)
+		if budget == None:
+			warnings.append ('{0}: no size budget recorded, the size is not checked. Run npm run update_bundle_budgets on a release build and commit {1}.'.format (bundlePath, budgetsPath))
+		errors.extend (GetBudgetErrors (bundlePath, bundles[bundlePath], budget))
+	if any (len (bundle['groups']) > 0 for bundle in bundles.values ()):
+		Utils.PrintInfo ('Group gzip sizes are estimated from the share of the group in the raw size, they are not measured.')
+
+	entry = {
+		'version' : HistoryVersion,
+		'time' : time.strftime ('%Y-%m-%dT%H:%M:%S'),
+		'bundles' : bundles
+	}
+	if bundles != oldBundles:
+		AppendHistoryEntry (HistoryPath, entry)
+	os.makedirs (os.path.dirname (ReportPath), exist_ok = True)
+	with open (ReportPath, 'w') as reportFile:
+		json.dump ({
+			'bundles' : bundles,
+			'errors' : errors,
+			'warnings' : warnings,
+			'notes' : ['The second value of every group is a gzip size estimated from the share of the group in the raw size, not a measurement.']
+		}, reportFile, indent = 4, sort_keys = True)
+
+	for warning in warnings:
+		Utils.PrintWarning (warning)
+	for error in errors:
+		Utils.PrintError (error)
+	if len (errors) > 0:
+		return 1
+	return 0
+
+sys.exit (Main (sys.argv))
@@ -1,9 +1,105 @@
 import os
 import sys
 import re
+import json
+import bisect
+import shutil
+import hashlib
+import concurrent.futures
 
 from lib import utils as Utils
 
+CacheVersion = 1
+LocPattern = re.compile ('[^F]Loc\\s{0,1}\\(\'(.*?)\'\\)')
+FLocPattern = re.compile ('FLoc\\s{0,1}\\(\'(.*?)\'\\,')
+
+def LoadJsonFile (filePath):
+    if not os.path.exists (filePath):
+        return {}
+    with open (filePath, encoding = 'utf-8') as jsonFile:
+        return json.load (jsonFile)
+
+def SaveJsonFile (filePath, content):
+    dirPath = os.path.dirname (filePath)
+    if not os.path.exists (dirPath):
+        os.makedirs (dirPath)
+    with open (filePath, 'w', encoding = 'utf-8') as jsonFile:
+        json.dump (content, jsonFile, indent = 4, sort_keys = True, ensure_ascii = False)
+
+def ScanFile (filePath, cachedEntry):
+    with open (filePath, 'rb') as file:
+        content = file.read ()
+    contentHash = hashlib.sha256 (content).hexdigest ()
+    if cachedEntry != None and cachedEntry['hash'] == contentHash:
+        return cachedEntry
+    content = content.decode ('utf-8')
+    lineStarts = [0]
+    for match in re.finditer ('\n', content):
+        lineStarts.append (match.end ())
+    occurrences = []
+    for pattern in [LocPattern, FLocPattern]:
+        for match in pattern.finditer (content):
+            line = bisect.bisect_right (lineStarts, match.start (1))
+            occurrences.append ([match.group (1).replace ('\\\'', '\''), line])
+    return {
+        'hash' : contentHash,
+        'strings' : occurrences
+    }
+
+def ScanFiles (rootDir, relevantFiles, cachePath):
+    # strings are cached per file by content hash, only changed files are scanned
+    oldCache = LoadJsonFile (cachePath)
+    oldFiles = oldCache['files'] if 'version' in oldCache and oldCache['version'] == CacheVersion else {}
+    files = {}
+    with concurrent.futures.ThreadPoolExecutor () as executor:
+        futures = {}
+        for file in relevantFiles:
+            relativePath = os.path.relpath (file, rootDir).replace (os.sep, '/')
+            cachedEntry = oldFiles[relativePath] if relativePath in oldFiles else None
+            futures[relativePath] = executor.submit (ScanFile, file, cachedEntry)
+        for relativePath in futures:
+            files[relativePath] = futures[relativePath].result ()
+    if files != oldFiles:
+        SaveJsonFile (cachePath, { 'version' : CacheVersion, 'files' : files })
+    return files
+
+def CreateStringIndex (files):
+    index = {}
+    for relativePath in sorted (files.keys ()):
+        for string, line in files[relativePath]['strings']:
+            if not string in index:
+                index[string] = []
+            index[string].append (relativePath + ':' + str (line))
+    return index
+
+def CreateLanguageBundles (index, translations, targetDir):
+    # one minified dictionary per language with a content-hashed name, the
+    # website loads languages.json and only the dictionary of the active language
+    if not os.path.exists (targetDir):
+        os.makedirs (targetDir)
+    languageStrings = {}
+    for string in sorted (index.keys ()):
+        if not string in translations:
+            continue
+        for languageCode, translation in translations[string].items ():
+            if not languageCode in languageStrings:
+                languageStrings[languageCode] = {}
+            languageStrings[languageCode][string] = translation
+
+    languages = {}
+    for languageCode in sorted (languageStrings.keys ()):
+        content = json.dumps (languageStrings[languageCode], separators = (',', ':'), ensure_ascii = False)
+        contentHash = hashlib.sha256 (content.encode ('utf-8')).hexdigest ()[:12]
+        fileName = languageCode + '.' + contentHash + '.json'
+        Utils.WriteContentToFile (os.path.join (targetDir, fileName), content)
+        languages[languageCode] = fileName
+        Utils.PrintInfo ('Language {0}: {1} strings, {2} bytes.'.format (languageCode, len (languageStrings[languageCode]), len (content.encode ('utf-8'))))
+    Utils.WriteContentToFile (os.path.join (targetDir, 'languages.json'), json.dumps (languages, separators = (',', ':')))
+
+    for fileName in os.listdir (targetDir):
+        if fileName != 'languages.json' and not fileName in languages.values ():
+            os.remove (os.path.join (targetDir, fileName))
+
 def Main (argv):
     toolsDir = os.path.dirname (os.path.abspath (__file__))
     rootDir = os.path.dirname (toolsDir)
@@ -21,19 +117,54 @@ def Main (argv):
                 if os.path.splitext (file)[1] == '.js':
                     relevantFiles.append (os.path.join (root, file))
 
-    strings = []
-    for file in relevantFiles:
-        fileContent = Utils.GetFileContent (file)
-        locMatches = re.findall ('[^F]Loc\s{0,1}\(\'(.*?)\'\)', fileContent)
-        flocMatches = re.findall ('FLoc\s{0,1}\(\'(.*?)\'\,', fileContent)
-        for matches in [locMatches, flocMatches]:
-            for match in matches:
-                if not match in strings:
-                    strings.append (match.replace ('\\\'', '\''))
-
-    strings.sort ()
-    for string in strings:
-        print (string)
+    cachePath = os.path.join (rootDir, 'build', 'cache', 'localized_strings.json')
+    files = ScanFiles (rootDir, relevantFiles, cachePath)
+
+    indexPath = os.path.join (rootDir, 'build', 'localization', 'localized_strings.json')
+    oldIndex = LoadJsonFile (indexPath)
+    index = CreateStringIndex (files)
+    SaveJsonFile (indexPath, index)
+
+    createBundles = 'bundle' in argv[1:]
+    strings = sorted (index.keys ())
+    if not createBundles:
+        for string in strings:
+            print (string)
+
+    addedStrings = [string for string in strings if not string in oldIndex]
+    removedStrings = sorted ([string for string in oldIndex if not string in index])
+    Utils.PrintInfo ('{0} strings, {1} added, {2} removed since the last run.'.format (len (strings), len (addedStrings), len (removedStrings)))
+    for string in addedStrings:
+        Utils.PrintInfo ('Added: ' + string)
+    for string in removedStrings:
+        Utils.PrintInfo ('Removed: ' + string)
+
+    # translations are in the format passed to SetLocalizedStrings in
+    # core/localization.js, a string to a language code to translation map
+    translationsPath = os.path.join (rootDir, 'plugins', 'website_localization_data.json')
+    for arg in argv[1:]:
+        if arg != 'bundle':
+            translationsPath = os.path.abspath (arg)
+    bundlesDir = os.path.join (rootDir, 'build', 'website', 'localization')
+    if createBundles and not os.path.exists (translationsPath) and os.path.exists (bundlesDir):
+        shutil.rmtree (bundlesDir)
+    if os.path.exists (translationsPath):
+        translations = LoadJsonFile (translationsPath)
+        unusedStrings = sorted ([string for string in translations if not string in index])
+        Utils.PrintInfo ('{0} unused translations.'.format (len (unusedStrings)))
+        for string in unusedStrings:
+            Utils.PrintInfo ('Unused: ' + string)
+        languageCodes = set ()
+        for string in translations:
+            languageCodes.update (translations[string].keys ())
+        for languageCode in sorted (languageCodes):
+            missingCount = 0
+            for string in strings:
+                if not string in translations or not languageCode in translations[string]:
+                    missingCount += 1
+            Utils.PrintInfo ('Language {0}: {1} strings not translated.'.format (languageCode, missingCount))
+        if createBundles:
+            CreateLanguageBundles (index, translations, bundlesDir)
 
     return 0
 
@@ -3,25 +3,142 @@ import sys
 import shutil
 import zipfile
 import json
+import zlib
+import struct
+import gzip
+import hashlib
+import time
+import concurrent.futures
 
 from lib import utils as Utils
 
+HashedNameLength = 12
+GzipMinSize = 1024
+GzipMaxRatio = 0.9
+StoredExtensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.woff', '.woff2', '.zip', '.gz']
+ZipMaxSize = 0xFFFFFFFF
+ZipMaxMemberCount = 0xFFFF
+
 def GetVersion (rootDir):
 	packageJson = None
 	with open (os.path.join (rootDir, 'package.json')) as packageJsonFile:
 		packageJson = json.load (packageJsonFile)
 	return packageJson['version']
 
-def CreateWebsite (rootDir, websiteDir, version, testBuild):
+def AddDirectoryFiles (files, sourceDir, targetDir):
+	if not os.path.isdir (sourceDir):
+		raise Exception ('Directory not found: ' + sourceDir)
+	for root, dirs, fileNames in os.walk (sourceDir):
+		for fileName in fileNames:
+			sourcePath = os.path.join (root, fileName)
+			relativePath = os.path.relpath (sourcePath, sourceDir)
+			files[os.path.join (targetDir, relativePath)] = sourcePath
+
+def LoadJsonFile (filePath):
+	if not os.path.exists (filePath):
+		return {}
+	with open (filePath) as jsonFile:
+		return json.load (jsonFile)
+
+def SaveJsonFile (filePath, content):
+	with open (filePath, 'w') as jsonFile:
+		json.dump (content, jsonFile, indent = 4, sort_keys = True)
+
+@Utils.Profiled ('copy', 'file', 'sourcePath')
+def CopyFileWithHash (sourcePath, targetPath):
+	targetDir = os.path.dirname (targetPath)
+	os.makedirs (targetDir, exist_ok = True)
+	shutil.copy2 (sourcePath, targetPath)
+	fileSize = os.path.getsize (targetPath)
+	Utils.AddProfileBytes (fileSize, fileSize)
+	return Utils.GetFileHash (targetPath)
+
+def SyncFiles (targetDir, files, forcedFiles, manifestPath):
+	# the manifest stores the state of every copied source file, a file is
+	# copied again only if its mtime and size changed and its hash differs
+	oldManifest = LoadJsonFile (manifestPath)
+	manifest = {}
+	filesToCopy = []
+	for relativePath, sourcePath in files.items ():
+		sourceStat = os.stat (sourcePath)
+		entry = {
+			'mtime' : sourceStat.st_mtime_ns,
+			'size' : sourceStat.st_size,
+			'hash' : None
+		}
+		manifest[relativePath] = entry
+		targetPath = os.path.join (targetDir, relativePath)
+		if relativePath in oldManifest and not relativePath in forcedFiles and os.path.exists (targetPath):
+			oldEntry = oldManifest[relativePath]
+			if oldEntry['size'] == entry['size']:
+				if oldEntry['mtime'] == entry['mtime']:
+					entry['hash'] = oldEntry['hash']
+					continue
+				sourceHash = Utils.GetFileHash (sourcePath)
+				if sourceHash == oldEntry['hash']:
+					entry['hash'] = sourceHash
+					continue
+		filesToCopy.append (relativePath)
+
+	removedCount = 0
+	for relativePath in oldManifest:
+		targetPath = os.path.join (targetDir, relativePath)
+		if not relativePath in manifest and os.path.exists (targetPath):
+			os.remove (targetPath)
+			removedCount += 1
+
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = {}
+		for relativePath in filesToCopy:
+			future = executor.submit (CopyFileWithHash, files[relativePath], os.path.join (targetDir, relativePath))
+			futures[future] = relativePath
+		for future in concurrent.futures.as_completed (futures):
+			manifest[futures[future]]['hash'] = future.result ()
+
+	SaveJsonFile (manifestPath, manifest)
+	Utils.PrintInfo ('Copied {0} files, kept {1}, removed {2}.'.format (len (filesToCopy), len (files) - len (filesToCopy), removedCount))
+
+def CreateHashedFileNames (websiteDir, fileUrls, assetManifestPath):
+	# renames the files to content-hashed names, so they can be served with
+	# immutable cache headers, and removes the ones from the previous build
+	oldAssetManifest = LoadJsonFile (assetManifestPath)
+	assetManifest = {}
+	for fileUrl in fileUrls:
+		filePath = os.path.join (websiteDir, fileUrl)
+		fileHash = Utils.GetFileHash (filePath)[:HashedNameLength]
+		urlBase, extension = os.path.splitext (fileUrl)
+		hashedUrl = urlBase + '.' + fileHash + extension
+		os.replace (filePath, os.path.join (websiteDir, hashedUrl))
+		assetManifest[fileUrl] = hashedUrl
+	RemoveHashedFileNames (websiteDir, oldAssetManifest, set (assetManifest.values ()))
+	SaveJsonFile (assetManifestPath, assetManifest)
+	return assetManifest
+
+def RemoveHashedFileNames (websiteDir, assetManifest, keptUrls):
+	for hashedUrl in assetManifest.values ():
+		hashedPath = os.path.join (websiteDir, hashedUrl)
+		if not hashedUrl in keptUrls and os.path.exists (hashedPath):
+			os.remove (hashedPath)
+
+def CreateWebsite (rootDir, websiteDir, manifestPath, assetManifestPath, hashedNames, version, testBuild):
 	if not os.path.exists (websiteDir):
 		os.makedirs (websiteDir)
 
-	shutil.copy2 (os.path.join (rootDir, 'website', 'index.html'), websiteDir)
-	shutil.copy2 (os.path.join (rootDir, 'website', 'embed.html'), websiteDir)
-	shutil.copy2 (os.path.join (rootDir, 'website', 'robots.txt'), websiteDir)
-	shutil.copytree (os.path.join (rootDir, 'build', 'website'), os.path.join (websiteDir, 'o3dv'))
-	shutil.copytree (os.path.join (rootDir, 'website', 'assets'), os.path.join (websiteDir, 'assets'))
-	shutil.copytree (os.path.join (rootDir, 'website', 'info'), os.path.join (websiteDir, 'info'))
+	htmlFileNames = [
+		'index.html',
+		'embed.html',
+		os.path.join ('info', 'index.html'),
+		os.path.join ('info', 'cookies.html'),
+		os.path.join ('info', 'faq.html')
+	]
+
+	files = {}
+	files['index.html'] = os.path.join (rootDir, 'website', 'index.html')
+	files['embed.html'] = os.path.join (rootDir, 'website', 'embed.html')
+	files['robots.txt'] = os.path.join (rootDir, 'website', 'robots.txt')
+	AddDirectoryFiles (files, os.path.join (rootDir, 'build', 'website'), 'o3dv')
+	AddDirectoryFiles (files, os.path.join (rootDir, 'website', 'assets'), 'assets')
+	AddDirectoryFiles (files, os.path.join (rootDir, 'website', 'info'), 'info')
 
 	pluginFiles = []
 	pluginsDir = os.path.join (rootDir, 'plugins')
@@ -29,89 +146,252 @@ def CreateWebsite (rootDir, websiteDir, version, testBuild):
 		for pluginFile in os.listdir (pluginsDir):
 			if os.path.splitext (pluginFile)[1] != '.js':
 				continue
-			websitePluginsDir = os.path.join (websiteDir, 'plugins');
-			if not os.path.exists (websitePluginsDir):
-				os.makedirs (websitePluginsDir)
-			shutil.copy2 (os.path.join (pluginsDir, pluginFile), os.path.join (websitePluginsDir, pluginFile))
+			files[os.path.join ('plugins', pluginFile)] = os.path.join (pluginsDir, pluginFile)
 			pluginFiles.append ('plugins/' + pluginFile)
 
+	# html files are modified after copy, so they are always copied again
+	with Utils.ProfileStep ('sync_files'):
+		SyncFiles (websiteDir, files, htmlFileNames, manifestPath)
+
 	websiteFiles = [
 		'o3dv/o3dv.website.min.css',
 		'o3dv/o3dv.website.min.js'
 	]
 
-	htmlFileNames = [
-		'index.html',
-		'embed.html',
-		os.path.join ('info', 'index.html'),
-		os.path.join ('info', 'cookies.html'),
-		os.path.join ('info', 'faq.html')
+	if hashedNames:
+		assetManifest = CreateHashedFileNames (websiteDir, websiteFiles + pluginFiles, assetManifestPath)
+		websiteFiles = [assetManifest[fileUrl] for fileUrl in websiteFiles]
+		pluginFiles = [assetManifest[fileUrl] for fileUrl in pluginFiles]
+		version = None
+	elif os.path.exists (assetManifestPath):
+		RemoveHashedFileNames (websiteDir, LoadJsonFile (assetManifestPath), set ())
+		os.remove (assetManifestPath)
+
+	# the replaced contents are the same for every html file, so they are
+	# collected once and each file is rendered in a single pass
+	regionLines = {
+		'website' : Utils.CreateFileLinkLines (websiteFiles, version),
+		'plugins' : Utils.CreateFileLinkLines (pluginFiles, version)
+	}
+	contentFiles = [
+		('meta', 'website_meta_data.txt', True),
+		('intro footer', 'website_intro_footer_data.txt', not testBuild),
+		('website analytics', 'website_analytics_data.txt', not testBuild),
+		('embed analytics', 'embed_analytics_data.txt', not testBuild)
 	]
+	for regionName, contentFileName, enabled in contentFiles:
+		contentFile = os.path.join (rootDir, 'plugins', contentFileName)
+		if os.path.exists (contentFile) and enabled:
+			regionLines[regionName] = Utils.GetFileContent (contentFile).splitlines ()
+
 	for htmlFileName in htmlFileNames:
 		htmlFilePath = os.path.join (websiteDir, htmlFileName)
-		replacer = Utils.TokenReplacer (htmlFilePath, False)
-		replacer.ReplaceTokenFileLinks ('<!-- website start -->', '<!-- website end -->', websiteFiles, version)
-		replacer.ReplaceTokenFileLinks ('<!-- plugins start -->', '<!-- plugins end -->', pluginFiles, version)
-		metaFile = os.path.join (rootDir, 'plugins', 'website_meta_data.txt')
-		if os.path.exists (metaFile):
-			metaContent = Utils.GetFileContent (metaFile)
-			replacer.ReplaceTokenContent ('<!-- meta start -->', '<!-- meta end -->', metaContent)
-		introFooterFile = os.path.join (rootDir, 'plugins', 'website_intro_footer_data.txt')
-		if os.path.exists (introFooterFile) and not testBuild:
-			introFooterContent = Utils.GetFileContent (introFooterFile)
-			replacer.ReplaceTokenContent ('<!-- intro footer start -->', '<!-- intro footer end -->', introFooterContent)
-		websiteAnalyticsFile = os.path.join (rootDir, 'plugins', 'website_analytics_data.txt')
-		if os.path.exists (websiteAnalyticsFile) and not testBuild:
-			websiteAnalyticsContent = Utils.GetFileContent (websiteAnalyticsFile)
-			replacer.ReplaceTokenContent ('<!-- website analytics start -->', '<!-- website analytics end -->', websiteAnalyticsContent)
-		embedAnalyticsFile = os.path.join (rootDir, 'plugins', 'embed_analytics_data.txt')
-		if os.path.exists (websiteAnalyticsFile) and not testBuild:
-			embedAnalyticsContent = Utils.GetFileContent (embedAnalyticsFile)
-			replacer.ReplaceTokenContent ('<!-- embed analytics start -->', '<!-- embed analytics end -->', embedAnalyticsContent)
-		replacer.WriteToFile (htmlFilePath)
-
-def CreateEnginePackage (rootDir, engineDir, websiteDir):
+		with Utils.ProfileStep ('html_file', 'file', { 'file' : htmlFileName }):
+			template = Utils.TokenTemplate (htmlFilePath, False)
+			template.WriteToFile (htmlFilePath, regionLines)
+
+@Utils.Profiled ('gzip', 'file', 'filePath')
+def CreatePrecompressedFile (filePath, oldEntry):
+	with open (filePath, 'rb') as sourceFile:
+		content = sourceFile.read ()
+	Utils.AddProfileBytes (len (content), 0)
+	entry = {
+		'size' : len (content),
+		'hash' : hashlib.sha256 (content).hexdigest ()
+	}
+	gzipPath = filePath + '.gz'
+	if oldEntry != None and oldEntry['hash'] == entry['hash'] and 'gzipHash' in oldEntry and os.path.exists (gzipPath):
+		entry['gzipSize'] = oldEntry['gzipSize']
+		entry['gzipHash'] = oldEntry['gzipHash']
+		return entry
+	extension = os.path.splitext (filePath)[1].lower ()
+	if extension in StoredExtensions or len (content) < GzipMinSize:
+		return entry
+	compressed = gzip.compress (content, compresslevel = 9, mtime = 0)
+	if len (compressed) > len (content) * GzipMaxRatio:
+		return entry
+	with open (gzipPath, 'wb') as gzipFile:
+		gzipFile.write (compressed)
+	Utils.AddProfileBytes (0, len (compressed))
+	entry['gzipSize'] = len (compressed)
+	entry['gzipHash'] = hashlib.sha256 (compressed).hexdigest ()
+	return entry
+
+def CreatePrecompressedFiles (websiteDir, manifestPath):
+	# creates .gz siblings so static hosts can serve them without compressing
+	# on the fly, files that do not shrink enough are served as they are
+	oldManifest = LoadJsonFile (manifestPath)
+	relativePaths = []
+	for root, dirs, fileNames in os.walk (websiteDir):
+		for fileName in fileNames:
+			if os.path.splitext (fileName)[1] == '.gz':
+				continue
+			relativePaths.append (os.path.relpath (os.path.join (root, fileName), websiteDir).replace (os.sep, '/'))
+
+	manifest = {}
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = {}
+		for relativePath in relativePaths:
+			oldEntry = oldManifest[relativePath] if relativePath in oldManifest else None
+			futures[relativePath] = executor.submit (CreatePrecompressedFile, os.path.join (websiteDir, relativePath), oldEntry)
+		for relativePath in sorted (futures.keys ()):
+			manifest[relativePath] = futures[relativePath].result ()
+
+	for root, dirs, fileNames in os.walk (websiteDir):
+		for fileName in fileNames:
+			if os.path.splitext (fileName)[1] != '.gz':
+				continue
+			gzipPath = os.path.join (root, fileName)
+			relativePath = os.path.relpath (gzipPath[:-3], websiteDir).replace (os.sep, '/')
+			if not relativePath in manifest or not 'gzipHash' in manifest[relativePath]:
+				os.remove (gzipPath)
+
+	SaveJsonFile (manifestPath, manifest)
+	compressedCount = sum (1 for entry in manifest.values () if 'gzipHash' in entry)
+	originalSize = sum (entry['size'] for entry in manifest.values () if 'gzipHash' in entry)
+	compressedSize = sum (entry['gzipSize'] for entry in manifest.values () if 'gzipHash' in entry)
+	Utils.PrintInfo ('Precompressed {0} of {1} files, {2} -> {3} bytes.'.format (compressedCount, len (manifest), originalSize, compressedSize))
+
+@Utils.Profiled ('zip_member', 'file', 'archiveName')
+def CompressZipMember (filePath, archiveName, compressLevel):
+	startTime = time.perf_counter ()
+	with open (filePath, 'rb') as memberFile:
+		content = memberFile.read ()
+	Utils.AddProfileBytes (len (content), 0)
+	zipInfo = zipfile.ZipInfo.from_file (filePath, archiveName)
+	zipInfo.file_size = len (content)
+	zipInfo.CRC = zlib.crc32 (content)
+	zipInfo.compress_type = zipfile.ZIP_STORED
+	data = content
+	extension = os.path.splitext (filePath)[1].lower ()
+	if compressLevel > 0 and not extension in StoredExtensions:
+		compressor = zlib.compressobj (compressLevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+		compressed = compressor.compress (content) + compressor.flush ()
+		if len (compressed) < len (content):
+			zipInfo.compress_type = zipfile.ZIP_DEFLATED
+			data = compressed
+	zipInfo.compress_size = len (data)
+	return zipInfo, data, time.perf_counter () - startTime
+
+def GetDosDateTime (dateTime):
+	year, month, day, hour, minute, second = dateTime
+	dosDate = (year - 1980) << 9 | month << 5 | day
+	dosTime = hour << 11 | minute << 5 | second // 2
+	return dosDate, dosTime
+
+class ZipArchiveWriter:
+	# zipfile can only write members it compresses itself, so the members
+	# compressed on the thread pool are written with this minimal writer,
+	# it supports archives without zip64 extensions only
+	def __init__ (self, zipPath):
+		self.file = open (zipPath, 'wb')
+		self.centralDirectory = []
+
+	def AddMember (self, zipInfo, data):
+		fileName = zipInfo.filename.encode ('utf-8')
+		flags = 0x800 if not zipInfo.filename.isascii () else 0
+		dosDate, dosTime = GetDosDateTime (zipInfo.date_time)
+		headerOffset = self.file.tell ()
+		if zipInfo.file_size > ZipMaxSize or headerOffset + len (data) > ZipMaxSize or len (self.centralDirectory) >= ZipMaxMemberCount:
+			raise Exception ('The package is too large for an archive without zip64 extensions.')
+		self.file.write (struct.pack ('<IHHHHHIIIHH',
+			0x04034b50, 20, flags, zipInfo.compress_type, dosTime, dosDate,
+			zipInfo.CRC, zipInfo.compress_size, zipInfo.file_size, len (fileName), 0
+		))
+		self.file.write (fileName)
+		self.file.write (data)
+		Utils.AddProfileBytes (0, self.file.tell () - headerOffset)
+		self.centralDirectory.append (struct.pack ('<IHHHHHHIIIHHHHHII',
+			0x02014b50, 3 << 8 | 20, 20, flags, zipInfo.compress_type, dosTime, dosDate,
+			zipInfo.CRC, zipInfo.compress_size, zipInfo.file_size, len (fileName), 0, 0, 0, 0,
+			zipInfo.external_attr, headerOffset
+		) + fileName)
+
+	def Close (self):
+		directoryOffset = self.file.tell ()
+		for entry in self.centralDirectory:
+			self.file.write (entry)
+		directorySize = self.file.tell () - directoryOffset
+		self.file.write (struct.pack ('<IHHHHIIH',
+			0x06054b50, 0, 0, len (self.centralDirectory), len (self.centralDirectory),
+			directorySize, directoryOffset, 0
+		))
+		self.file.close ()
+
+def CreateEnginePackage (rootDir, engineDir, websiteDir, compressLevel):
 	if not os.path.exists (engineDir):
 		os.makedirs (engineDir)
 
-	zipPath = os.path.join (engineDir, 'o3dv.zip')
-	zip = zipfile.ZipFile (zipPath, mode = 'w', compression = zipfile.ZIP_DEFLATED)
+	members = []
 	for file in os.listdir (os.path.join (websiteDir, 'assets', 'envmaps')):
 		filePath = os.path.join (websiteDir, 'assets', 'envmaps', file)
 		if os.path.isdir (filePath):
 			for fileInDir in os.listdir (filePath):
-				zip.write (os.path.join (filePath, fileInDir), 'envmaps/' + file + '/' + fileInDir)
-		else:
-			zip.write (filePath, 'envmaps/' + file)
-	zip.write (os.path.join (rootDir, 'build', 'engine', 'o3dv.min.js'), 'o3dv.min.js')
-	zip.write (os.path.join (rootDir, 'LICENSE.md'), 'o3dv.license.md')
-	zip.close ()
+				if os.path.splitext (fileInDir)[1] == '.gz':
+					continue
+				members.append ((os.path.join (filePath, fileInDir), 'envmaps/' + file + '/' + fileInDir))
+		elif os.path.splitext (file)[1] != '.gz':
+			members.append ((filePath, 'envmaps/' + file))
+	members.append ((os.path.join (rootDir, 'build', 'engine', 'o3dv.min.js'), 'o3dv.min.js'))
+	members.append ((os.path.join (rootDir, 'LICENSE.md'), 'o3dv.license.md'))
+
+	startTime = time.perf_counter ()
+	zipPath = os.path.join (engineDir, 'o3dv.zip')
+	# members are compressed on the thread pool, and written to the archive
+	# in their original order as they finish
+	zip = ZipArchiveWriter (zipPath)
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = []
+		for filePath, archiveName in members:
+			futures.append (executor.submit (CompressZipMember, filePath, archiveName, compressLevel))
+		for future in futures:
+			zipInfo, data, compressTime = future.result ()
+			zip.AddMember (zipInfo, data)
+			method = 'deflate' if zipInfo.compress_type == zipfile.ZIP_DEFLATED else 'store'
+			Utils.PrintInfo ('{0}: {1}, {2} -> {3} bytes, {4:.1f} ms'.format (zipInfo.filename, method, zipInfo.file_size, zipInfo.compress_size, compressTime * 1000.0))
+	zip.Close ()
+	Utils.PrintInfo ('Package size: {0} bytes, {1:.1f} ms'.format (os.path.getsize (zipPath), (time.perf_counter () - startTime) * 1000.0))
 	return True
 
 def Main (argv):
 	toolsDir = os.path.dirname (os.path.abspath (__file__))
 	rootDir = os.path.dirname (toolsDir)
 	os.chdir (rootDir)
+	Utils.StartProfiling ('create_package')
 
 	testBuild = False
+	incrementalBuild = 'incremental' in argv[1:]
+	hashedNames = 'hashed_names' in argv[1:]
+	compressLevel = 6
+	for arg in argv[1:]:
+		if arg.startswith ('zip_level='):
+			compressLevel = int (arg[len ('zip_level='):])
 
 	buildDir = os.path.join (rootDir, 'build', 'package')
-	if len (argv) >= 2 and argv[1] == 'test':
+	if 'test' in argv[1:]:
 		testBuild = True
 		buildDir = os.path.join (rootDir, 'build', 'package_test')
 		Utils.PrintInfo ('Creating test build.')
 
 	websiteDir = os.path.join (buildDir, 'website')
 	engineDir = os.path.join (buildDir, 'engine')
-	if os.path.exists (buildDir):
+	websiteManifestPath = os.path.join (buildDir, 'website_manifest.json')
+	assetManifestPath = os.path.join (buildDir, 'asset_manifest.json')
+	if os.path.exists (buildDir) and not incrementalBuild:
 		shutil.rmtree (buildDir)
 
 	version = GetVersion (rootDir)
 	Utils.PrintInfo ('Create build directory')
-	CreateWebsite (rootDir, websiteDir, version, testBuild)
+	with Utils.ProfileStep ('create_website'):
+		CreateWebsite (rootDir, websiteDir, websiteManifestPath, assetManifestPath, hashedNames, version, testBuild)
+
+	Utils.PrintInfo ('Create precompressed files.')
+	with Utils.ProfileStep ('precompress'):
+		CreatePrecompressedFiles (websiteDir, os.path.join (buildDir, 'static_manifest.json'))
 
 	Utils.PrintInfo ('Create package.')
-	packageResult = CreateEnginePackage (rootDir, engineDir, websiteDir)
+	with Utils.ProfileStep ('create_package'):
+		packageResult = CreateEnginePackage (rootDir, engineDir, websiteDir, compressLevel)
 	if not packageResult:
 		Utils.PrintError ('Create package failed.')
 		return 1
@@ -7,10 +7,15 @@ import subprocess
 import platform
 import html
 import re
+import hashlib
 
+from lib import utils as Utils
 from lib.doc_entities import PageType, PageGroup, PageDoc, EnumMemberDoc, EnumDoc, ParameterDoc, ReturnsDoc, FunctionDoc, ClassDoc
 from lib.doc_generator import Documentation, GenerateDocumentation
 
+JsDocCacheVersion = 1
+JsDocSourcePattern = re.compile (r'.+\.js(doc|x)?$')
+
 def GetDictValue (dict, key):
     if not key in dict:
         return None
@@ -82,6 +87,7 @@ def AddPageGroupsToDocumentation (documentation, pageGroups, sourcesFolder):
             pageGroupDoc.AddPage (pageDoc)
         documentation.AddPageGroup (pageGroupDoc)
 
+@Utils.Profiled ('build_model')
 def AddEntitiesToDocumentation (documentation, doclets):
     classNameToDoc = {}
     enumNameToDoc = {}
@@ -119,25 +125,71 @@ def AddEntitiesToDocumentation (documentation, doclets):
                 memberDoc = EnumMemberDoc (name, description)
                 enumDoc.AddMember (memberDoc)
 
-def Main (argv):
-    toolsDir = os.path.dirname (os.path.abspath (__file__))
-    rootDir = os.path.dirname (toolsDir)
-    os.chdir (rootDir)
+def GetDocumentedSourcesHash (rootDir, jsDocConfigPath):
+    # the hash covers the jsdoc configuration and every file it documents,
+    # so the cached model is valid as long as none of them changed
+    hasher = hashlib.sha256 ()
+    hasher.update (Utils.GetFileHash (jsDocConfigPath).encode ('utf-8'))
+    jsDocConfig = None
+    with open (jsDocConfigPath) as jsDocConfigJson:
+        jsDocConfig = json.load (jsDocConfigJson)
+    sourcePaths = []
+    for include in jsDocConfig['source']['include']:
+        for folder, subFolders, fileNames in os.walk (os.path.join (rootDir, include)):
+            for fileName in fileNames:
+                if JsDocSourcePattern.match (fileName):
+                    sourcePaths.append (os.path.join (folder, fileName))
+    for sourcePath in sorted (sourcePaths):
+        relativePath = os.path.relpath (sourcePath, rootDir).replace ('\\', '/')
+        hasher.update (relativePath.encode ('utf-8'))
+        hasher.update (Utils.GetFileHash (sourcePath).encode ('utf-8'))
+    return hasher.hexdigest ()
+
+def GetJsDocResult (rootDir, cachePath):
+    jsDocConfigPath = os.path.join (rootDir, 'tools', 'jsdoc.json')
+    sourcesHash = GetDocumentedSourcesHash (rootDir, jsDocConfigPath)
+    if os.path.exists (cachePath):
+        with open (cachePath) as cacheFile:
+            cache = json.load (cacheFile)
+        if GetDictValue (cache, 'version') == JsDocCacheVersion and GetDictValue (cache, 'hash') == sourcesHash:
+            Utils.PrintInfo ('Documented sources are unchanged, using cached jsdoc model.')
+            return cache['doclets']
 
     shell = True
     if platform.system () != 'Windows':
         shell = False
     result = subprocess.run (['jsdoc', '-c', 'tools/jsdoc.json'], stdout = subprocess.PIPE, shell = shell)
+    if result.returncode != 0:
+        return None
     resultJson = json.loads (result.stdout)
 
+    cacheDir = os.path.dirname (cachePath)
+    if not os.path.exists (cacheDir):
+        os.makedirs (cacheDir)
+    with open (cachePath, 'w') as cacheFile:
+        json.dump ({
+            'version' : JsDocCacheVersion,
+            'hash' : sourcesHash,
+            'doclets' : resultJson
+        }, cacheFile)
+    return resultJson
+
+def Main (argv):
+    toolsDir = os.path.dirname (os.path.abspath (__file__))
+    rootDir = os.path.dirname (toolsDir)
+    os.chdir (rootDir)
+    Utils.StartProfiling ('generate_docs')
+
+    cacheDir = os.path.join (rootDir, 'build', 'cache')
+    with Utils.ProfileStep ('jsdoc'):
+        resultJson = GetJsDocResult (rootDir, os.path.join (cacheDir, 'jsdoc.json'))
+    if resultJson == None:
+        Utils.PrintError ('Failed to run jsdoc.')
+        return 1
+
     resultDir = os.path.join (rootDir, 'docs')
     sourceDir = os.path.join (resultDir, 'source')
 
-    for fileName in os.listdir (resultDir):
-        filePath = os.path.join (resultDir, fileName)
-        if not os.path.isdir (filePath):
-            os.remove (filePath)
-
     config = None
     with open (os.path.join (sourceDir, 'config.json')) as configJson:
         config = json.load (configJson)
@@ -152,7 +204,10 @@ def Main (argv):
     for name in config['external_refs']:
         documentation.AddEntityLink (name, config['external_refs'][name])
 
-    GenerateDocumentation (documentation, sourceDir, resultDir)
+    compact = 'compact' in argv[1:]
+    with Utils.ProfileStep ('generate'):
+        GenerateDocumentation (documentation, sourceDir, resultDir, os.path.join (cacheDir, 'docs_pages.json'), compact)
     return 0
 
-sys.exit (Main (sys.argv))
+if __name__ == '__main__':
+    sys.exit (Main (sys.argv))
@@ -1,51 +1,236 @@
 import os
+import re
 import sys
+import json
 import shutil
+import hashlib
+import concurrent.futures
 
 from lib import utils as Utils
 
+IconCacheVersion = 2
+
+IconLiteralPattern = re.compile (r'([\'"`])([A-Za-z0-9_]+)\1')
+IconClassPattern = re.compile (r'icon-([A-Za-z0-9_]+)')
+IconUsageExtensions = ['.js', '.css', '.html']
+
+# every font contains only the icons referenced by the files of its part of
+# the website, the generated css is not scanned because it lists every icon,
+# plugins are scanned too, because they pass icon names to the website
+IconFonts = [
+	('website', ['source/website', 'website/index.html', 'website/embed.html', 'plugins'], 'source/website/css', 'O3DVIcons/O3DVIcons.woff'),
+	('info', ['website/info'], 'website/info/css', './O3DVIcons.woff')
+]
+
+@Utils.Profiled ('optimize_icon', 'file', 'iconPath')
+def OptimizeIcon (iconPath, optimizedPath, tempDir):
+	# every icon is fixed in its own folder, so the icons can be processed in
+	# parallel, and the result is moved to the cache only when both steps succeed
+	iconFileName = os.path.basename (iconPath)
+	sourceDir = os.path.join (tempDir, 'source')
+	fixedDir = os.path.join (tempDir, 'fixed')
+	os.makedirs (sourceDir)
+	os.makedirs (fixedDir)
+	shutil.copy (iconPath, os.path.join (sourceDir, iconFileName))
+
+	exitCode, output = Utils.RunCommandWithOutput ('oslllo-svg-fixer', ['-s', sourceDir, '-d', fixedDir])
+	if exitCode != 0:
+		return output
+	optimizedTempPath = os.path.join (tempDir, 'optimized.svg')
+	exitCode, output = Utils.RunCommandWithOutput ('svgo', [os.path.join (fixedDir, iconFileName), '-o', optimizedTempPath])
+	if exitCode != 0:
+		return output
+	os.replace (optimizedTempPath, optimizedPath)
+	shutil.rmtree (tempDir)
+	return None
+
+@Utils.Profiled ('optimize_icons')
+def OptimizeIcons (iconsDir, iconHashes, iconCacheDir, tempDir):
+	changedIcons = []
+	for iconName in iconHashes:
+		if not os.path.exists (os.path.join (iconCacheDir, iconHashes[iconName] + '.svg')):
+			changedIcons.append (iconName)
+
+	success = True
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = {}
+		for iconName in changedIcons:
+			iconHash = iconHashes[iconName]
+			futures[iconName] = executor.submit (
+				OptimizeIcon,
+				os.path.join (iconsDir, iconName + '.svg'),
+				os.path.join (iconCacheDir, iconHash + '.svg'),
+				os.path.join (tempDir, iconHash)
+			)
+		for iconName in futures:
+			error = futures[iconName].result ()
+			if error != None:
+				Utils.PrintError ('Failed to optimize ' + iconName + ':\n' + error)
+				success = False
+
+	usedFileNames = set ([iconHashes[iconName] + '.svg' for iconName in iconHashes])
+	for fileName in os.listdir (iconCacheDir):
+		if not fileName in usedFileNames:
+			os.remove (os.path.join (iconCacheDir, fileName))
+
+	Utils.PrintInfo ('Icons: {0} optimized, {1} from cache.'.format (len (changedIcons), len (iconHashes) - len (changedIcons)))
+	return success
+
+def GetUsageFilePaths (rootDir, usagePaths):
+	filePaths = []
+	for usagePath in usagePaths:
+		fullPath = os.path.join (rootDir, usagePath)
+		if os.path.isfile (fullPath):
+			filePaths.append (fullPath)
+			continue
+		for folder, subFolders, fileNames in os.walk (fullPath):
+			for fileName in fileNames:
+				if fileName != 'icons.css' and os.path.splitext (fileName)[1] in IconUsageExtensions:
+					filePaths.append (os.path.join (folder, fileName))
+	return filePaths
+
+@Utils.Profiled ('scan_usage')
+def GetUsedIcons (rootDir, usagePaths, iconNames):
+	# icon names are passed around as string literals and used as css classes
+	# in html, so any literal or class matching an icon name counts as usage
+	usedNames = set ()
+	for filePath in GetUsageFilePaths (rootDir, usagePaths):
+		content = Utils.GetFileContent (filePath)
+		for match in IconLiteralPattern.finditer (content):
+			usedNames.add (match.group (2))
+		usedNames.update (IconClassPattern.findall (content))
+	return sorted (usedNames & set (iconNames))
+
+def WriteFileIfChanged (filePath, content):
+	if os.path.exists (filePath):
+		with open (filePath, 'rb') as file:
+			if file.read () == content:
+				return False
+	with open (filePath, 'wb') as file:
+		file.write (content)
+	return True
+
+@Utils.Profiled ('generate_font', 'file', 'cssDir')
+def GenerateIconFont (fontIconHashes, iconCacheDir, tempDir, cssDir, woffUrl):
+	fontIconsDir = os.path.join (tempDir, 'icons')
+	iconFontDir = os.path.join (tempDir, 'iconfont')
+	os.makedirs (fontIconsDir)
+	os.makedirs (iconFontDir)
+	for iconName in fontIconHashes:
+		shutil.copy (os.path.join (iconCacheDir, fontIconHashes[iconName] + '.svg'), os.path.join (fontIconsDir, iconName + '.svg'))
+
+	exitCode, output = Utils.RunCommandWithOutput ('fantasticon', [
+		fontIconsDir,
+		'-o', iconFontDir,
+		'-t', 'woff',
+		'-n', 'O3DVIcons'
+	])
+	if exitCode != 0:
+		return output
+
+	woffPath = os.path.join (cssDir, woffUrl)
+	woffDir = os.path.dirname (woffPath)
+	if not os.path.exists (woffDir):
+		os.makedirs (woffDir)
+
+	iconsCss = Utils.GetFileContent (os.path.join (iconFontDir, 'O3DVIcons.css'))
+	iconsCss = iconsCss.replace ('./O3DVIcons.woff', woffUrl)
+	with open (os.path.join (iconFontDir, 'O3DVIcons.woff'), 'rb') as woffFile:
+		WriteFileIfChanged (woffPath, woffFile.read ())
+	WriteFileIfChanged (os.path.join (cssDir, 'icons.css'), iconsCss.encode ('utf-8'))
+	return None
+
+def GetIconSetHash (iconHashes):
+	hasher = hashlib.sha256 ()
+	hasher.update (json.dumps ({
+		'version' : IconCacheVersion,
+		'icons' : iconHashes
+	}, sort_keys = True).encode ('utf-8'))
+	return hasher.hexdigest ()
+
 def Main (argv):
 	toolsDir = os.path.dirname (os.path.abspath (__file__))
 	rootDir = os.path.dirname (toolsDir)
 	os.chdir (rootDir)
+	Utils.StartProfiling ('generate_icon_font')
 
 	iconsDir = os.path.join (rootDir, 'assets', 'icons')
-	tempDir = os.path.join ('build', 'temp')
+	cacheDir = os.path.join ('build', 'cache')
+	iconCacheDir = os.path.join (cacheDir, 'icons')
+	if not os.path.exists (iconCacheDir):
+		os.makedirs (iconCacheDir)
+	cachePath = os.path.join (cacheDir, 'icon_font.json')
+
+	tempDir = os.path.join ('build', 'temp', 'icon_font')
 	if os.path.exists (tempDir):
 		shutil.rmtree (tempDir)
-	fixedIconsDir = os.path.join (tempDir, 'icons')
-	if not os.path.exists (fixedIconsDir):
-		os.makedirs (fixedIconsDir)
 
-	iconFontDir = os.path.join (tempDir, 'iconfont')
-	if not os.path.exists (iconFontDir):
-		os.makedirs (iconFontDir)
+	iconHashes = {}
+	for iconFileName in sorted (os.listdir (iconsDir)):
+		iconName, extension = os.path.splitext (iconFileName)
+		if extension == '.svg':
+			iconHashes[iconName] = Utils.GetFileHash (os.path.join (iconsDir, iconFileName))
 
-	Utils.RunCommand ('oslllo-svg-fixer', [
-		'-s', iconsDir,
-		'-d', fixedIconsDir
-	])
-	Utils.RunCommand ('svgo', [fixedIconsDir])
-	Utils.RunCommand ('fantasticon', [
-		fixedIconsDir,
-		'-o', iconFontDir,
-		'-t', 'woff',
-		'-n', 'O3DVIcons'
-	])
+	if not OptimizeIcons (iconsDir, iconHashes, iconCacheDir, os.path.join (tempDir, 'optimize')):
+		return 1
+
+	subsetFonts = not 'full' in argv[1:]
+	fontIcons = {}
+	allUsedIcons = set ()
+	for fontName, usagePaths, cssDir, woffUrl in IconFonts:
+		if subsetFonts:
+			usedIcons = GetUsedIcons (rootDir, usagePaths, iconHashes.keys ())
+		else:
+			usedIcons = list (iconHashes.keys ())
+		fontIcons[fontName] = {iconName : iconHashes[iconName] for iconName in usedIcons}
+		allUsedIcons.update (usedIcons)
+		Utils.PrintInfo ('Icon font {0}: {1} of {2} icons.'.format (fontName, len (usedIcons), len (iconHashes)))
+
+	unusedIcons = sorted (set (iconHashes.keys ()) - allUsedIcons)
+	if len (unusedIcons) > 0:
+		Utils.PrintInfo ('Unused icons: ' + ', '.join (unusedIcons))
+
+	# a font is generated only when its set of optimized icons changed
+	oldFontHashes = {}
+	if os.path.exists (cachePath):
+		with open (cachePath) as cacheFile:
+			cache = json.load (cacheFile)
+		if 'version' in cache and cache['version'] == IconCacheVersion:
+			oldFontHashes = cache['fonts']
+
+	fontHashes = {}
+	changedFonts = []
+	for fontName, usagePaths, cssDir, woffUrl in IconFonts:
+		fontHashes[fontName] = GetIconSetHash (fontIcons[fontName])
+		outputPaths = [os.path.join (cssDir, 'icons.css'), os.path.join (cssDir, woffUrl)]
+		if fontName in oldFontHashes and oldFontHashes[fontName] == fontHashes[fontName] and all (os.path.exists (outputPath) for outputPath in outputPaths):
+			continue
+		changedFonts.append ((fontName, cssDir, woffUrl))
+
+	if len (changedFonts) == 0:
+		Utils.PrintInfo ('Icon fonts are unchanged, skipping font generation.')
+		return 0
 
-	websiteCssDir = os.path.join (rootDir, 'source', 'website', 'css')
-	websiteIconFontDir = os.path.join (websiteCssDir, 'O3DVIcons')
-	if not os.path.exists (websiteIconFontDir):
-		os.makedirs (websiteIconFontDir)
+	success = True
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = {}
+		for fontName, cssDir, woffUrl in changedFonts:
+			futures[fontName] = executor.submit (GenerateIconFont, fontIcons[fontName], iconCacheDir, os.path.join (tempDir, fontName), os.path.join (rootDir, cssDir), woffUrl)
+		for fontName in futures:
+			error = futures[fontName].result ()
+			if error != None:
+				Utils.PrintError ('Failed to generate icon font ' + fontName + ':\n' + error)
+				fontHashes[fontName] = None
+				success = False
 
-	websiteIconsCssPath = os.path.join (websiteCssDir, 'icons.css')
-	shutil.copy (os.path.join (iconFontDir, 'O3DVIcons.css'), websiteIconsCssPath)
-	Utils.ReplaceStringInFile (websiteIconsCssPath, './O3DVIcons.woff', 'O3DVIcons/O3DVIcons.woff')
-	shutil.copy (os.path.join (iconFontDir, 'O3DVIcons.woff'), websiteIconFontDir)
+	with open (cachePath, 'w') as cacheFile:
+		json.dump ({
+			'version' : IconCacheVersion,
+			'fonts' : fontHashes
+		}, cacheFile, indent = 4)
 
-	infoCssDir = os.path.join (rootDir, 'website', 'info', 'css')
-	shutil.copy (os.path.join (iconFontDir, 'O3DVIcons.css'), os.path.join (infoCssDir, 'icons.css'))
-	shutil.copy (os.path.join (iconFontDir, 'O3DVIcons.woff'), os.path.join (infoCssDir, 'O3DVIcons.woff'))
+	if not success:
+		return 1
 
 	shutil.rmtree (tempDir)
 
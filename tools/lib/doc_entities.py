@@ -3,7 +3,7 @@ from enum import Enum
 
 from . import utils as Utils
 from .html_generator import HtmlGenerator
-from .doc_utils import ReplaceLinksInText, FinalizeDescription, FunctionType, GenerateFunctionHtml
+from .doc_utils import FinalizeDescription, FunctionType, GenerateFunctionHtml
 
 class DocEntity:
     def GetName (self):
@@ -12,7 +12,7 @@ class DocEntity:
     def GetLocation (self):
         raise Exception ('Not implemented.')
 
-    def GetHtml (self, entityLinks, eol):
+    def GetHtml (self, linkResolver, eol):
         raise Exception ('Not implemented.')
 
 class PageGroup:
@@ -44,10 +44,10 @@ class PageDoc (DocEntity):
         else:
             return self.link
 
-    def GetHtml (self, entityLinks, eol):
+    def GetHtml (self, linkResolver, eol):
         if self.type == PageType.Internal:
             pageContent = Utils.GetFileContent (os.path.join (self.folder, self.link))
-            return '<div class="page">' + eol + ReplaceLinksInText (pageContent, entityLinks) + eol + '</div>'
+            return '<div class="page">' + eol + linkResolver.ReplaceLinks (pageContent) + eol + '</div>'
         else:
             raise Exception ('GetHtml called for external link.')
 
@@ -71,10 +71,10 @@ class EnumDoc (DocEntity):
     def GetLocation (self):
         return 'Enum_' + self.name + '.html'
 
-    def GetHtml (self, entityLinks, eol):
+    def GetHtml (self, linkResolver, eol):
         generator = HtmlGenerator (eol)
         generator.AddTag ('h1', self.name)
-        generator.AddTagWithClass ('div', 'description', FinalizeDescription (self.description, entityLinks))
+        generator.AddTagWithClass ('div', 'description', FinalizeDescription (self.description, linkResolver))
         if len (self.members) > 0:
             generator.AddTag ('h2', 'Values')
             for member in self.members:
@@ -82,7 +82,7 @@ class EnumDoc (DocEntity):
                 generator.AddTagWithClass ('span', 'parameter_name', member.name)
                 generator.EndTag ('div')
                 generator.BeginTagWithClass ('div', 'parameter_main')
-                generator.AddTagWithClass ('div', 'parameter_description', FinalizeDescription (member.description, entityLinks))
+                generator.AddTagWithClass ('div', 'parameter_description', FinalizeDescription (member.description, linkResolver))
                 generator.EndTag ('div')
         return generator.GetHtml ()
 
@@ -118,10 +118,10 @@ class FunctionDoc (DocEntity):
     def GetLocation (self):
         return 'Function_' + self.name + '.html'
 
-    def GetHtml (self, navigation, eol):
+    def GetHtml (self, linkResolver, eol):
         generator = HtmlGenerator (eol)
         generator.AddTag ('h1', self.name)
-        GenerateFunctionHtml (self, generator, navigation, FunctionType.Standalone)
+        GenerateFunctionHtml (self, generator, linkResolver, FunctionType.Standalone)
         return generator.GetHtml ()
 
 class ClassDoc (DocEntity):
@@ -143,15 +143,15 @@ class ClassDoc (DocEntity):
     def GetLocation (self):
         return 'Class_' + self.name + '.html'
 
-    def GetHtml (self, entityLinks, eol):
+    def GetHtml (self, linkResolver, eol):
         generator = HtmlGenerator (eol)
         generator.AddTag ('h1', self.name)
-        generator.AddTagWithClass ('div', 'description', FinalizeDescription (self.description, entityLinks))
+        generator.AddTagWithClass ('div', 'description', FinalizeDescription (self.description, linkResolver))
         if self.constructor != None:
             generator.AddTag ('h2', 'Constructor')
-            GenerateFunctionHtml (self.constructor, generator, entityLinks, FunctionType.Constructor)
+            GenerateFunctionHtml (self.constructor, generator, linkResolver, FunctionType.Constructor)
         if len (self.functions) > 0:
            generator.AddTag ('h2', 'Methods')
            for function in self.functions:
-               GenerateFunctionHtml (function, generator, entityLinks, FunctionType.Standalone.ClassMethod)
+               GenerateFunctionHtml (function, generator, linkResolver, FunctionType.Standalone.ClassMethod)
         return generator.GetHtml ()
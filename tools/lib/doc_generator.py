@@ -1,9 +1,22 @@
 import os
-import shutil
+import re
+import json
+import time
+import hashlib
+import concurrent.futures
+from enum import Enum
 
 from . import utils as Utils
-from .html_generator import HtmlGenerator
-from .doc_entities import PageType
+from .html_generator import HtmlGenerator, MinifyHtml
+from .doc_entities import PageType, PageDoc
+from .doc_utils import LinkResolver
+from .doc_search import GenerateSearchIndex
+
+PageCacheVersion = 3
+PageTokenPattern = re.compile (r'\$\$\$([A-Z]+)\$\$\$')
+ParallelPageCount = 32
+SearchIndexFileName = 'search_index.json'
+NavigationFileName = 'navigation.js'
 
 class Documentation:
     def __init__ (self):
@@ -34,14 +47,75 @@ class Documentation:
         assert (not name in self.entityLinks)
         self.entityLinks[name] = url
 
-def GenerateDocumentationPage (documentation, templatePath, resultDirPath, navigationHtml, entity, eol):
-    resultPath = os.path.join (resultDirPath, entity.GetLocation ())
-    shutil.copy (templatePath, resultPath)
-    Utils.ReplaceStringsInFile (resultPath, [
-        ('$$$TITLE$$$', entity.GetName ()),
-        ('$$$NAVIGATION$$$', navigationHtml),
-        ('$$$MAIN$$$', entity.GetHtml (documentation.entityLinks, eol))
-    ])
+class PageTemplate:
+    def __init__ (self, templatePath):
+        content = Utils.GetFileContent (templatePath)
+        self.eol = Utils.GetEOLChar (content)
+        # even indices are literal text, odd indices are token names
+        self.parts = PageTokenPattern.split (content)
+
+    def Render (self, values):
+        result = []
+        for i in range (0, len (self.parts)):
+            part = self.parts[i]
+            if i % 2 == 0:
+                result.append (part)
+            elif part in values:
+                result.append (values[part])
+            else:
+                result.append ('$$$' + part + '$$$')
+        return ''.join (result)
+
+class PageRenderer:
+    def __init__ (self, template, navigationHtml, entityLinks, targetFolder, minify):
+        self.template = template
+        self.navigationHtml = navigationHtml
+        self.linkResolver = LinkResolver (entityLinks)
+        self.targetFolder = targetFolder
+        self.minify = minify
+
+    def RenderPage (self, entity):
+        pageHtml = self.template.Render ({
+            'TITLE' : entity.GetName (),
+            'NAVIGATION' : self.navigationHtml,
+            'MAIN' : entity.GetHtml (self.linkResolver, self.template.eol)
+        })
+        if self.minify:
+            pageHtml = MinifyHtml (pageHtml)
+        return pageHtml
+
+    def WritePage (self, entity):
+        # pages can be written in worker processes, so the profile record is
+        # returned with the result instead of being added to the profiler
+        startTime = time.perf_counter ()
+        startCpuTime = time.thread_time ()
+        location = entity.GetLocation ()
+        resultPath = os.path.join (self.targetFolder, location)
+        Utils.WriteContentToFile (resultPath, self.RenderPage (entity))
+        record = Utils.CreateProfileRecord ('page', 'page', startTime, startCpuTime, 0, os.path.getsize (resultPath), { 'page' : location })
+        return record, self.linkResolver.TakeUnresolvedLinks ()
+
+gPageRenderer = None
+
+def InitPageWorker (pageRenderer):
+    global gPageRenderer
+    gPageRenderer = pageRenderer
+    Utils.StopProfiling ()
+
+def WritePageInWorker (entity):
+    return gPageRenderer.WritePage (entity)
+
+def WritePages (pageRenderer, entities):
+    # the renderer is sent to every worker once, only the entities are
+    # transferred per page, and every worker writes its own pages and sends
+    # back the profile records and the unresolved links of them
+    # with a single worker the process pool would only add the startup and
+    # the pickling costs, so the pages are rendered in this process
+    workerCount = min (os.cpu_count () or 1, len (entities))
+    if len (entities) < ParallelPageCount or workerCount < 2:
+        return [pageRenderer.WritePage (entity) for entity in entities], 1
+    with concurrent.futures.ProcessPoolExecutor (max_workers = workerCount, initializer = InitPageWorker, initargs = (pageRenderer, )) as executor:
+        return list (executor.map (WritePageInWorker, entities, chunksize = 8)), workerCount
 
 def GenerateLinkHtml (entityName, entityLink):
     target = '_blank' if entityLink.startswith ('http') else '_self'
@@ -55,6 +129,7 @@ def AddNavigationSection (generator, name, entities):
         generator.AddTagWithAttributes ('div', [('id', 'nav-' + entity.GetName ()), ('class', 'navigation_item')], linkHtml)
     generator.EndTag ('div')
 
+@Utils.Profiled ('navigation')
 def GenerateNavigationHtml (documentation, eol):
     generator = HtmlGenerator (eol)
     for pageGroup in documentation.pageGroups:
@@ -64,17 +139,118 @@ def GenerateNavigationHtml (documentation, eol):
     AddNavigationSection (generator, 'Enums', sorted (documentation.enums, key = lambda x : x.name))
     return generator.GetHtml ()
 
-def GenerateDocumentation (documentation, sourceFolder, targetFolder):
-    templateHtmlPath = os.path.join (sourceFolder, 'Template.html')
-    eol = Utils.GetEOLCharFromFile (templateHtmlPath)
+def SerializeDocObject (obj):
+    if isinstance (obj, Enum):
+        return obj.name
+    return vars (obj)
+
+@Utils.Profiled ('fingerprint', 'page')
+def GetPageFingerprint (entity, commonHash):
+    # a page depends on its own entity, and on the generator, the template,
+    # the navigation and the entity links which are shared by every page
+    # (commonHash)
+    hasher = hashlib.sha256 ()
+    hasher.update (commonHash.encode ('utf-8'))
+    hasher.update (json.dumps (entity, default = SerializeDocObject, sort_keys = True).encode ('utf-8'))
+    if isinstance (entity, PageDoc) and entity.type == PageType.Internal:
+        hasher.update (Utils.GetFileHash (os.path.join (entity.folder, entity.link)).encode ('utf-8'))
+    return hasher.hexdigest ()
+
+def GetGeneratorHash ():
+    # the pages depend on the code rendering them, so a change in any module
+    # of the generator renders every page again
+    generatorFolder = os.path.dirname (os.path.abspath (__file__))
+    hasher = hashlib.sha256 ()
+    for fileName in sorted (os.listdir (generatorFolder)):
+        if os.path.splitext (fileName)[1] != '.py':
+            continue
+        hasher.update (fileName.encode ('utf-8'))
+        hasher.update (Utils.GetFileHash (os.path.join (generatorFolder, fileName)).encode ('utf-8'))
+    return hasher.hexdigest ()
+
+def GetCommonHash (templateHtmlPath, navigationHtml, entityLinks, compact):
+    hasher = hashlib.sha256 ()
+    hasher.update (GetGeneratorHash ().encode ('utf-8'))
+    hasher.update (Utils.GetFileHash (templateHtmlPath).encode ('utf-8'))
+    hasher.update (b'compact' if compact else b'default')
+    hasher.update (navigationHtml.encode ('utf-8'))
+    hasher.update (json.dumps (entityLinks, sort_keys = True).encode ('utf-8'))
+    return hasher.hexdigest ()
+
+def LoadPageCache (pageCachePath):
+    if pageCachePath == None or not os.path.exists (pageCachePath):
+        return {}, []
+    with open (pageCachePath) as pageCacheFile:
+        pageCache = json.load (pageCacheFile)
+    if not 'version' in pageCache or pageCache['version'] != PageCacheVersion:
+        return {}, []
+    return pageCache['pages'], pageCache['shared']
 
-    navigationHtml = GenerateNavigationHtml (documentation, eol)
+def SavePageCache (pageCachePath, pages, sharedFileNames):
+    pageCacheDir = os.path.dirname (pageCachePath)
+    if not os.path.exists (pageCacheDir):
+        os.makedirs (pageCacheDir)
+    with open (pageCachePath, 'w') as pageCacheFile:
+        json.dump ({
+            'version' : PageCacheVersion,
+            'pages' : pages,
+            'shared' : sharedFileNames
+        }, pageCacheFile, indent = 4, sort_keys = True)
 
+def WriteFileIfChanged (filePath, content):
+    if os.path.exists (filePath) and Utils.GetFileContent (filePath) == content:
+        return False
+    Utils.WriteContentToFile (filePath, content)
+    return True
+
+def WriteSearchIndex (documentation, targetFolder):
+    return WriteFileIfChanged (os.path.join (targetFolder, SearchIndexFileName), GenerateSearchIndex (documentation))
+
+def WriteNavigationScript (navigationHtml, targetFolder, eol):
+    # the script inserts the navigation in place of itself, so the pages can
+    # share one cached copy of it, and the hash in the url invalidates it
+    content = 'document.currentScript.insertAdjacentHTML (\'beforebegin\', ' + json.dumps (navigationHtml) + ');' + eol
+    WriteFileIfChanged (os.path.join (targetFolder, NavigationFileName), content)
+    contentHash = hashlib.sha256 (content.encode ('utf-8')).hexdigest ()
+    return '<script type="text/javascript" src="{0}?{1}"></script>'.format (NavigationFileName, contentHash[:12])
+
+def GetTotalFileSize (targetFolder, fileNames):
+    totalSize = 0
+    for fileName in fileNames:
+        filePath = os.path.join (targetFolder, fileName)
+        if os.path.exists (filePath):
+            totalSize += os.path.getsize (filePath)
+    return totalSize
+
+def RemoveStalePages (targetFolder, oldLocations, locations):
+    # only the files written by a previous run are removed, anything else in
+    # the target folder is left alone
+    removed = 0
+    for location in sorted (oldLocations):
+        filePath = os.path.join (targetFolder, location)
+        if location in locations or not os.path.isfile (filePath):
+            continue
+        os.remove (filePath)
+        removed += 1
+    return removed
+
+def GenerateDocumentation (documentation, sourceFolder, targetFolder, pageCachePath = None, compact = False):
+    # in compact mode the navigation is written once to a shared script
+    # instead of every page, and the pages are minified
+    startTime = time.perf_counter ()
+    template = PageTemplate (os.path.join (sourceFolder, 'Template.html'))
+    navigationHtml = GenerateNavigationHtml (documentation, template.eol)
+    sharedFileNames = [SearchIndexFileName]
+    if compact:
+        navigationHtml = WriteNavigationScript (MinifyHtml (navigationHtml), targetFolder, template.eol)
+        sharedFileNames.append (NavigationFileName)
+
+    entities = []
     for pageGroup in documentation.pageGroups:
         for page in pageGroup.pages:
             if page.type == PageType.External:
                 continue
-            GenerateDocumentationPage (documentation, templateHtmlPath, targetFolder, navigationHtml, page, eol)
+            entities.append (page)
 
     allEntities = [
         documentation.classes,
@@ -82,5 +258,75 @@ def GenerateDocumentation (documentation, sourceFolder, targetFolder):
         documentation.enums
     ]
     for entityList in allEntities:
-        for entity in entityList:
-            GenerateDocumentationPage (documentation, templateHtmlPath, targetFolder, navigationHtml, entity, eol)
+        entities.extend (entityList)
+
+    # without a page cache every page is rendered again, and no stale page
+    # can be removed
+    oldPages, oldSharedFileNames = LoadPageCache (pageCachePath)
+    commonHash = GetCommonHash (os.path.join (sourceFolder, 'Template.html'), navigationHtml, documentation.entityLinks, compact)
+    pages = {}
+    changedEntities = []
+    for entity in entities:
+        location = entity.GetLocation ()
+        fingerprint = GetPageFingerprint (entity, commonHash)
+        if location in oldPages and oldPages[location]['fingerprint'] == fingerprint and os.path.exists (os.path.join (targetFolder, location)):
+            pages[location] = oldPages[location]
+            continue
+        pages[location] = {
+            'fingerprint' : fingerprint,
+            'unresolved' : []
+        }
+        changedEntities.append (entity)
+    prepareTime = time.perf_counter () - startTime
+
+    renderStartTime = time.perf_counter ()
+    pageRenderer = PageRenderer (template, navigationHtml, documentation.entityLinks, targetFolder, compact)
+    with Utils.ProfileStep ('render_pages'):
+        pageResults, workerCount = WritePages (pageRenderer, changedEntities)
+        for pageRecord, unresolvedLinks in pageResults:
+            Utils.AddProfileRecord (pageRecord)
+    renderTime = time.perf_counter () - renderStartTime
+
+    # unresolved links of unchanged pages come from the page cache, so the
+    # report always covers the whole documentation
+    pageTimes = []
+    for i in range (0, len (changedEntities)):
+        pageRecord, unresolvedLinks = pageResults[i]
+        pageTimes.append (pageRecord['wall'])
+        pages[changedEntities[i].GetLocation ()]['unresolved'] = unresolvedLinks
+
+    with Utils.ProfileStep ('search_index'):
+        searchIndexChanged = WriteSearchIndex (documentation, targetFolder)
+    removed = RemoveStalePages (targetFolder, set (oldPages) | set (oldSharedFileNames), set (pages) | set (sharedFileNames))
+    if pageCachePath != None:
+        SavePageCache (pageCachePath, pages, sharedFileNames)
+    totalTime = time.perf_counter () - startTime
+
+    Utils.PrintInfo ('Documentation pages: {0} rendered, {1} unchanged, {2} removed, search index {3}.'.format (
+        len (changedEntities),
+        len (pages) - len (changedEntities),
+        removed,
+        'updated' if searchIndexChanged else 'unchanged'
+    ))
+    Utils.PrintInfo ('Documentation time: {0:.1f} ms (prepare {1:.1f} ms, render {2:.1f} ms with {3} process(es), total page time {4:.1f} ms).'.format (
+        totalTime * 1000.0,
+        prepareTime * 1000.0,
+        renderTime * 1000.0,
+        workerCount,
+        sum (pageTimes) * 1000.0
+    ))
+    Utils.PrintInfo ('Documentation size: {0} bytes in pages, {1} bytes in shared files.'.format (
+        GetTotalFileSize (targetFolder, pages),
+        GetTotalFileSize (targetFolder, sharedFileNames)
+    ))
+    if len (pageTimes) > 0:
+        slowestIndex = max (range (len (pageTimes)), key = lambda i : pageTimes[i])
+        Utils.PrintInfo ('Slowest page: {0} ({1:.1f} ms).'.format (changedEntities[slowestIndex].GetLocation (), pageTimes[slowestIndex] * 1000.0))
+
+    unresolvedLinks = {}
+    for location in sorted (pages):
+        for name in pages[location]['unresolved']:
+            unresolvedLinks.setdefault (name, []).append (location)
+    for name in sorted (unresolvedLinks):
+        Utils.PrintError ('Unresolved link: {0} ({1}).'.format (name, ', '.join (unresolvedLinks[name])))
+    return unresolvedLinks
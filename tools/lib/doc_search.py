@@ -0,0 +1,116 @@
+import re
+import json
+
+from .doc_entities import PageType
+
+WordPattern = re.compile (r'[A-Za-z0-9]+')
+NamePartPattern = re.compile (r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+LinkPattern = re.compile (r'{@link ([^{}]+)}')
+TagPattern = re.compile (r'<[^<>]+>')
+
+StopWords = set ([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'for', 'from', 'has', 'if', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'see', 'that', 'the', 'this', 'to', 'will', 'with'
+])
+
+def GetNameTokens (name):
+    # the whole name and its camel case parts, so "LoadModelFromUrlList"
+    # can be found by "loadmodel" and by "url" as well
+    tokens = [name.lower ()]
+    for part in NamePartPattern.findall (name):
+        tokens.append (part.lower ())
+    return tokens
+
+def GetTextTokens (text):
+    if text == None:
+        return []
+    text = TagPattern.sub (' ', LinkPattern.sub (r'\1', text))
+    tokens = []
+    for word in WordPattern.findall (text):
+        word = word.lower ()
+        if len (word) < 2 or word in StopWords:
+            continue
+        tokens.append (word)
+    return tokens
+
+class SearchIndexBuilder:
+    def __init__ (self):
+        self.entries = []
+        self.names = {}
+        self.words = {}
+
+    def AddEntry (self, title, url, kind):
+        self.entries.append ([title, url, kind])
+        return len (self.entries) - 1
+
+    def AddName (self, entryId, name):
+        for token in GetNameTokens (name):
+            self.AddToken (self.names, token, entryId)
+
+    def AddText (self, entryId, text):
+        for token in GetTextTokens (text):
+            self.AddToken (self.words, token, entryId)
+
+    def AddToken (self, tokens, token, entryId):
+        entryIds = tokens.setdefault (token, [])
+        if len (entryIds) == 0 or entryIds[-1] != entryId:
+            entryIds.append (entryId)
+
+    def AddParameters (self, entryId, parameters):
+        if parameters == None:
+            return
+        for parameter in parameters:
+            self.AddName (entryId, parameter.name)
+            self.AddText (entryId, parameter.description)
+            self.AddParameters (entryId, parameter.subParameters)
+
+    def AddFunction (self, entryId, function):
+        self.AddName (entryId, function.name)
+        self.AddText (entryId, function.description)
+        self.AddParameters (entryId, function.parameters)
+        if function.returns != None:
+            self.AddText (entryId, function.returns.description)
+
+    def GetIndex (self):
+        return {
+            'entries' : self.entries,
+            'names' : self.names,
+            'words' : self.words
+        }
+
+def GenerateSearchIndex (documentation):
+    # entries point to pages or to the function anchors of the class pages,
+    # names and words map tokens to entry indices
+    builder = SearchIndexBuilder ()
+    for pageGroup in documentation.pageGroups:
+        for page in pageGroup.pages:
+            if page.type == PageType.External:
+                continue
+            builder.AddName (builder.AddEntry (page.name, page.GetLocation (), 'page'), page.name)
+
+    for classDoc in documentation.classes:
+        location = classDoc.GetLocation ()
+        classId = builder.AddEntry (classDoc.name, location, 'class')
+        builder.AddName (classId, classDoc.name)
+        builder.AddText (classId, classDoc.description)
+        if classDoc.constructor != None:
+            builder.AddFunction (classId, classDoc.constructor)
+        for function in classDoc.functions:
+            functionId = builder.AddEntry (classDoc.name + '.' + function.name, location + '#' + function.name, 'method')
+            builder.AddFunction (functionId, function)
+
+    for function in documentation.functions:
+        functionId = builder.AddEntry (function.name, function.GetLocation () + '#' + function.name, 'function')
+        builder.AddFunction (functionId, function)
+
+    for enumDoc in documentation.enums:
+        location = enumDoc.GetLocation ()
+        enumId = builder.AddEntry (enumDoc.name, location, 'enum')
+        builder.AddName (enumId, enumDoc.name)
+        builder.AddText (enumId, enumDoc.description)
+        for member in enumDoc.members:
+            memberId = builder.AddEntry (enumDoc.name + '.' + member.name, location, 'member')
+            builder.AddName (memberId, member.name)
+            builder.AddText (memberId, member.description)
+
+    return json.dumps (builder.GetIndex (), separators = (',', ':'), sort_keys = True)
@@ -2,65 +2,80 @@ import re
 import html
 from enum import Enum
 
+LinkPattern = re.compile (r'{@link ([^{}]+)}')
+ArrayTypePattern = re.compile (r'Array\.&lt;(.+)&gt')
+InvalidCharTable = str.maketrans ('\r\n\t', '   ')
+
 def CleanUpText (text):
     if text == None:
         return ''
-    invalidChars = ['\r', '\n', '\t']
-    for invalidChar in invalidChars:
-        text = text.replace (invalidChar, ' ')
-    text = html.escape (text)
-    return text
+    return html.escape (text.translate (InvalidCharTable))
 
 def GenerateLink (entityName, entityLink):
     target = '_blank' if entityLink.startswith ('http') else '_self'
     return '<a href="{1}" target="{2}">{0}</a>'.format (entityName, entityLink, target)
 
-def FinalizeType (text, entityLinks):
+class LinkResolver:
+    def __init__ (self, entityLinks):
+        self.entityLinks = entityLinks
+        self.linkHtmls = {}
+        self.unresolvedLinks = set ()
+
+    def GetLinkHtml (self, name):
+        if not name in self.entityLinks:
+            return None
+        if not name in self.linkHtmls:
+            self.linkHtmls[name] = GenerateLink (name, self.entityLinks[name])
+        return self.linkHtmls[name]
+
+    def ResolveLink (self, name):
+        linkHtml = self.GetLinkHtml (name)
+        if linkHtml == None:
+            self.unresolvedLinks.add (name)
+            return name
+        return linkHtml
+
+    def ReplaceLinks (self, text):
+        return LinkPattern.sub (lambda match : self.ResolveLink (match.group (1)), text)
+
+    def TakeUnresolvedLinks (self):
+        unresolvedLinks = sorted (self.unresolvedLinks)
+        self.unresolvedLinks = set ()
+        return unresolvedLinks
+
+def FinalizeType (text, linkResolver):
     text = CleanUpText (text)
-    arrayMatch = re.match ('Array\.&lt;(.+)&gt', text)
+    arrayMatch = ArrayTypePattern.match (text)
     if arrayMatch != None:
         matchedName = arrayMatch.group (1)
-        if matchedName in entityLinks:
-            return GenerateLink (matchedName, entityLinks[matchedName]) + '[]'
-        else:
-            return arrayMatch.group (1) + '[]'
-    if text in entityLinks:
-        return GenerateLink (text, entityLinks[text])
-    return text
+        linkHtml = linkResolver.GetLinkHtml (matchedName)
+        return (linkHtml if linkHtml != None else matchedName) + '[]'
+    linkHtml = linkResolver.GetLinkHtml (text)
+    return linkHtml if linkHtml != None else text
 
-def ReplaceLinksInText (text, entityLinks):
-    links = re.findall ('{@link ([^{}]+)}', text)
-    for link in links:
-        if link in entityLinks:
-            text = text.replace ('{@link ' + link + '}', GenerateLink (link, entityLinks[link]))
-        else:
-            text = text.replace ('{@link ' + link + '}', link)
-    return text
-
-def FinalizeDescription (text, entityLinks):
-    text = CleanUpText (text)
-    return ReplaceLinksInText (text, entityLinks)
+def FinalizeDescription (text, linkResolver):
+    return linkResolver.ReplaceLinks (CleanUpText (text))
 
-def GenerateParameterTypesHtml (paramTypes, generator, entityLinks):
+def GenerateParameterTypesHtml (paramTypes, generator, linkResolver):
     for i in range (0, len (paramTypes)):
         paramType = paramTypes[i]
-        paramTypeHtml = FinalizeType (paramType, entityLinks)
+        paramTypeHtml = FinalizeType (paramType, linkResolver)
         generator.AddTagWithClass ('span', 'type parameter_type', paramTypeHtml)
         if (i < len (paramTypes) - 1):
             generator.AddTagWithClass ('span', 'parameter_type_separator', '|')
 
-def GenerateParameterListHtml (parameters, generator, entityLinks):
+def GenerateParameterListHtml (parameters, generator, linkResolver):
     for param in parameters:
         generator.BeginTagWithClass ('div', 'parameter_header')
         generator.AddTagWithClass ('span', 'parameter_name', param.name)
-        GenerateParameterTypesHtml (param.types, generator, entityLinks)
+        GenerateParameterTypesHtml (param.types, generator, linkResolver)
         if param.isOptional:
             generator.AddTagWithClass ('span', 'parameter_attributes', '(optional)')
         generator.EndTag ('div')
         generator.BeginTagWithClass ('div', 'parameter_main')
-        generator.AddTagWithClass ('div', 'parameter_description', FinalizeDescription (param.description, entityLinks))
+        generator.AddTagWithClass ('div', 'parameter_description', FinalizeDescription (param.description, linkResolver))
         if len (param.subParameters) > 0:
-            GenerateParameterListHtml (param.subParameters, generator, entityLinks)
+            GenerateParameterListHtml (param.subParameters, generator, linkResolver)
         generator.EndTag ('div')
 
 class FunctionType (Enum):
@@ -68,7 +83,7 @@ class FunctionType (Enum):
     ClassMethod = 2
     Standalone = 3
 
-def GenerateFunctionHtml (function, generator, entityLinks, type):
+def GenerateFunctionHtml (function, generator, linkResolver, type):
     paramNames = map (lambda x : x.name, function.parameters)
     functionSignature = function.name + ' (' + ', '.join (paramNames) + ')'
     if type == FunctionType.Constructor:
@@ -77,16 +92,16 @@ def GenerateFunctionHtml (function, generator, entityLinks, type):
     generator.AddTagWithAttributes ('div', [('id', function.name), ('class', 'function_signature')], functionSignature)
     if function.description != None:
         generator.AddTagWithClass ('div', 'function_title', 'Description')
-        generator.AddTagWithClass ('div', 'function_description', FinalizeDescription (function.description, entityLinks))
+        generator.AddTagWithClass ('div', 'function_description', FinalizeDescription (function.description, linkResolver))
     if function.parameters != None and len (function.parameters) > 0:
         generator.AddTagWithClass ('div', 'function_title', 'Parameters')
-        GenerateParameterListHtml (function.parameters, generator, entityLinks)
+        GenerateParameterListHtml (function.parameters, generator, linkResolver)
     if function.returns != None:
         generator.AddTagWithClass ('div', 'function_title', 'Returns')
         generator.BeginTagWithClass ('div', 'function_returns')
         if function.returns.types != None:
-            GenerateParameterTypesHtml (function.returns.types, generator, entityLinks)
+            GenerateParameterTypesHtml (function.returns.types, generator, linkResolver)
         if function.returns.description != None:
-            generator.AddTagWithClass ('span', 'return_description', FinalizeDescription (function.returns.description, entityLinks))
+            generator.AddTagWithClass ('span', 'return_description', FinalizeDescription (function.returns.description, linkResolver))
         generator.EndTag ('div')
     generator.EndTag ('div')
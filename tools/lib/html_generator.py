@@ -1,10 +1,40 @@
+import re
+
+ProtectedBlockPattern = re.compile (r'<(pre|script|style|textarea)\b[\s\S]*?</\1>', re.IGNORECASE)
+CommentPattern = re.compile (r'<!--[\s\S]*?-->')
+WhitespacePattern = re.compile (r'\s+')
+BlockTagPattern = re.compile (r'\s*(<!DOCTYPE[^>]*>|</?(?:html|head|body|div|h1|h2|h3|h4|p|ul|ol|li|table|tr|td|th|meta|link|title)\b[^>]*>)\s*', re.IGNORECASE)
+
+def MinifyHtmlText (text):
+    text = CommentPattern.sub ('', text)
+    text = WhitespacePattern.sub (' ', text)
+    return BlockTagPattern.sub (r'\1', text)
+
+def MinifyHtml (content):
+    # whitespace is collapsed everywhere except in the blocks where it is
+    # significant, and removed around block level tags
+    result = []
+    position = 0
+    for match in ProtectedBlockPattern.finditer (content):
+        result.append (MinifyHtmlText (content[position : match.start ()]))
+        result.append (match.group (0))
+        position = match.end ()
+    result.append (MinifyHtmlText (content[position:]))
+    return ''.join (result)
+
 class HtmlGenerator:
-    def __init__ (self, eol):
-        self.html = ''
+    def __init__ (self, eol, sink = None):
+        # with a sink (any object with a write method) the content is
+        # streamed to it instead of being collected in memory
+        self.parts = []
         self.eol = eol
+        self.sink = sink
 
     def AddText (self, content):
-        self.html += content
+        if self.sink != None:
+            self.sink.write (content)
+        else:
+            self.parts.append (content)
 
     def AddLine (self, content):
         self.AddText (content + self.eol)
@@ -33,4 +63,6 @@ class HtmlGenerator:
         self.AddLine ('</{0}>'.format (tagName))
 
     def GetHtml (self):
-        return self.html
+        if len (self.parts) > 1:
+            self.parts = [''.join (self.parts)]
+        return self.parts[0] if len (self.parts) > 0 else ''
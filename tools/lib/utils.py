@@ -1,10 +1,35 @@
 import os
 import re
+import sys
+import json
+import time
 import codecs
+import inspect
+import functools
+import atexit
+import hashlib
+import platform
+import threading
+import subprocess
+import tracemalloc
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+TokenBegPattern = re.compile (r'^([^\r\n]*?)<!-- ([^<>]+?) start -->', re.MULTILINE)
+ProfileEnvironmentVariable = 'O3DV_PROFILE'
+ProfileOutputDir = os.path.join ('build', 'profile')
+
+gProfiler = None
 
 def PrintInfo (message):
 	print ('INFO: ' + message)
 
+def PrintWarning (message):
+	print ('WARNING: ' + message)
+
 def PrintError (message):
 	print ('ERROR: ' + message)
 
@@ -12,23 +37,351 @@ def GetFileContent (filePath):
 	fileObject = codecs.open (filePath, 'r', 'utf-8')
 	content = fileObject.read ()
 	fileObject.close ()
+	if gProfiler != None:
+		AddProfileBytes (os.path.getsize (filePath), 0)
 	return content
 
 def WriteContentToFile (filePath, content):
 	fileObject = codecs.open (filePath, 'w', 'utf-8')
 	fileObject.write (content)
 	fileObject.close ()
+	if gProfiler != None:
+		AddProfileBytes (0, os.path.getsize (filePath))
 
-def GetEOLCharFromFile (filePath):
-	content = GetFileContent (filePath)
+def GetFileHash (filePath):
+	hasher = hashlib.sha256 ()
+	bytesRead = 0
+	with open (filePath, 'rb') as fileObject:
+		while True:
+			chunk = fileObject.read (1 << 20)
+			if not chunk:
+				break
+			hasher.update (chunk)
+			bytesRead += len (chunk)
+	AddProfileBytes (bytesRead, 0)
+	return hasher.hexdigest ()
+
+def GetChildCpuTime ():
+	# the usage is kept through exec, so the start value is subtracted to
+	# leave out the children of a launcher script
+	if resource == None:
+		return 0.0
+	childUsage = resource.getrusage (resource.RUSAGE_CHILDREN)
+	return childUsage.ru_utime + childUsage.ru_stime
+
+class ProfileStep:
+	def __init__ (self, name, category = 'step', args = None):
+		self.name = name
+		self.category = category
+		self.args = args
+		self.startTime = None
+		self.startCpuTime = None
+		self.peakMemory = 0
+		self.bytesRead = 0
+		self.bytesWritten = 0
+		self.parent = None
+		self.depth = 0
+
+	def __enter__ (self):
+		if gProfiler != None:
+			gProfiler.BeginStep (self)
+		return self
+
+	def __exit__ (self, excType, excValue, traceback):
+		if gProfiler != None and self.startTime != None:
+			gProfiler.EndStep (self)
+		return False
+
+def Profiled (name, category = 'step', argName = None):
+	# runs the whole function as a step, the value of the argument named
+	# argName is recorded with it, so the steps can be told apart
+	def Decorator (function):
+		signature = inspect.signature (function)
+		@functools.wraps (function)
+		def Wrapper (*args, **kwargs):
+			if gProfiler == None:
+				return function (*args, **kwargs)
+			stepArgs = None
+			if argName != None:
+				stepArgs = { argName : str (signature.bind (*args, **kwargs).arguments[argName]) }
+			with ProfileStep (name, category, stepArgs):
+				return function (*args, **kwargs)
+		return Wrapper
+	return Decorator
+
+class Profiler:
+	def __init__ (self, toolName):
+		self.toolName = toolName
+		self.startTime = time.perf_counter ()
+		self.startCpuTime = time.process_time ()
+		self.records = []
+		self.openSteps = []
+		self.peakMemory = 0
+		self.childCpuTime = GetChildCpuTime ()
+		self.lock = threading.Lock ()
+		self.threadState = threading.local ()
+		self.mainStack = self.GetStack ()
+		tracemalloc.start ()
+
+	def GetStack (self):
+		if not hasattr (self.threadState, 'stack'):
+			self.threadState.stack = []
+		return self.threadState.stack
+
+	def UpdatePeakMemory (self):
+		# the peak since the last step boundary belongs to every step that was
+		# open in that interval, so the peak is reset at every boundary
+		current, peak = tracemalloc.get_traced_memory ()
+		for step in self.openSteps:
+			step.peakMemory = max (step.peakMemory, peak)
+		self.peakMemory = max (self.peakMemory, peak)
+		tracemalloc.reset_peak ()
+		return current
+
+	def BeginStep (self, step):
+		# steps started on the threads of a pool belong to the current step
+		# of the main thread, which waits for the pool
+		stack = self.GetStack ()
+		if len (stack) > 0:
+			step.parent = stack[-1]
+		elif len (self.mainStack) > 0:
+			step.parent = self.mainStack[-1]
+		step.depth = step.parent.depth + 1 if step.parent != None else 0
+		with self.lock:
+			step.peakMemory = self.UpdatePeakMemory ()
+			self.openSteps.append (step)
+		stack.append (step)
+		step.startTime = time.perf_counter ()
+		step.startCpuTime = time.thread_time ()
+
+	def EndStep (self, step):
+		record = CreateProfileRecord (step.name, step.category, step.startTime, step.startCpuTime, step.bytesRead, step.bytesWritten, step.args)
+		self.GetStack ().remove (step)
+		with self.lock:
+			if step.parent != None:
+				step.parent.bytesRead += step.bytesRead
+				step.parent.bytesWritten += step.bytesWritten
+			self.UpdatePeakMemory ()
+			self.openSteps.remove (step)
+		record['peakMemory'] = step.peakMemory
+		record['depth'] = step.depth
+		self.AddRecord (record)
+
+	def GetCurrentStep (self):
+		stack = self.GetStack ()
+		if len (stack) > 0:
+			return stack[-1]
+		if len (self.mainStack) > 0:
+			return self.mainStack[-1]
+		return None
+
+	def AddBytes (self, bytesRead, bytesWritten):
+		step = self.GetCurrentStep ()
+		if step == None:
+			return
+		with self.lock:
+			step.bytesRead += bytesRead
+			step.bytesWritten += bytesWritten
+
+	def AddRecord (self, record):
+		with self.lock:
+			self.records.append (record)
+
+	def Finish (self):
+		self.UpdatePeakMemory ()
+		tracemalloc.stop ()
+		wallTime = time.perf_counter () - self.startTime
+		cpuTime = time.process_time () - self.startCpuTime
+		maxResidentMemory = None
+		childCpuTime = None
+		if resource != None:
+			# linux reports kilobytes, macos reports bytes
+			maxResidentMemory = resource.getrusage (resource.RUSAGE_SELF).ru_maxrss
+			if sys.platform != 'darwin':
+				maxResidentMemory *= 1024
+			# the external tools started by the tool run in child processes
+			childCpuTime = GetChildCpuTime () - self.childCpuTime
+
+		if not os.path.exists (ProfileOutputDir):
+			os.makedirs (ProfileOutputDir)
+		traceEvents = [{
+			'name' : self.toolName,
+			'cat' : 'tool',
+			'ph' : 'X',
+			'ts' : 0.0,
+			'dur' : wallTime * 1000000.0,
+			'pid' : os.getpid (),
+			'tid' : threading.main_thread ().ident,
+			'args' : {
+				'cpu_ms' : cpuTime * 1000.0,
+				'peak_memory' : self.peakMemory,
+				'max_resident_memory' : maxResidentMemory,
+				'child_cpu_ms' : childCpuTime * 1000.0 if childCpuTime != None else None
+			}
+		}]
+		for record in self.records:
+			args = {
+				'cpu_ms' : record['cpu'] * 1000.0,
+				'peak_memory' : record['peakMemory'],
+				'bytes_read' : record['bytesRead'],
+				'bytes_written' : record['bytesWritten']
+			}
+			if record['args'] != None:
+				args.update (record['args'])
+			traceEvents.append ({
+				'name' : record['name'],
+				'cat' : record['category'],
+				'ph' : 'X',
+				'ts' : (record['start'] - self.startTime) * 1000000.0,
+				'dur' : record['wall'] * 1000000.0,
+				'pid' : record['pid'],
+				'tid' : record['tid'],
+				'args' : args
+			})
+		with open (os.path.join (ProfileOutputDir, self.toolName + '.trace.json'), 'w') as traceFile:
+			json.dump ({ 'traceEvents' : traceEvents, 'displayTimeUnit' : 'ms' }, traceFile)
+
+		summaryLines = self.GetSummaryLines (wallTime, cpuTime, childCpuTime, maxResidentMemory)
+		with open (os.path.join (ProfileOutputDir, self.toolName + '.summary.txt'), 'w') as summaryFile:
+			summaryFile.write ('\n'.join (summaryLines) + '\n')
+		for line in summaryLines:
+			PrintInfo (line)
+
+	def GetSummaryLines (self, wallTime, cpuTime, childCpuTime, maxResidentMemory):
+		# steps with the same name are aggregated, nested steps are indented
+		# by the depth of their first occurrence
+		groups = {}
+		for record in self.records:
+			if not record['name'] in groups:
+				groups[record['name']] = {
+					'depth' : record['depth'],
+					'first' : record['start'],
+					'count' : 0,
+					'wall' : 0.0,
+					'cpu' : 0.0,
+					'peakMemory' : 0,
+					'bytesRead' : 0,
+					'bytesWritten' : 0
+				}
+			group = groups[record['name']]
+			group['depth'] = min (group['depth'], record['depth'])
+			group['first'] = min (group['first'], record['start'])
+			group['count'] += 1
+			group['wall'] += record['wall']
+			group['cpu'] += record['cpu']
+			group['peakMemory'] = max (group['peakMemory'], record['peakMemory'])
+			group['bytesRead'] += record['bytesRead']
+			group['bytesWritten'] += record['bytesWritten']
+
+		lines = []
+		header = 'Profile of {0}: {1:.1f} ms wall, {2:.1f} ms cpu, {3:.1f} MB peak traced memory'.format (
+			self.toolName, wallTime * 1000.0, cpuTime * 1000.0, self.peakMemory / 1048576.0
+		)
+		if childCpuTime != None:
+			header += ', {0:.1f} ms cpu in child processes'.format (childCpuTime * 1000.0)
+		if maxResidentMemory != None:
+			header += ', {0:.1f} MB max resident memory'.format (maxResidentMemory / 1048576.0)
+		lines.append (header)
+		lines.append ('{0:<32} {1:>6} {2:>10} {3:>10} {4:>9} {5:>11} {6:>11}'.format ('step', 'count', 'wall ms', 'cpu ms', 'peak MB', 'read KB', 'written KB'))
+		for name in sorted (groups.keys (), key = lambda x : groups[x]['first']):
+			group = groups[name]
+			lines.append ('{0:<32} {1:>6} {2:>10.1f} {3:>10.1f} {4:>9.1f} {5:>11.1f} {6:>11.1f}'.format (
+				('  ' * group['depth'] + name)[:32],
+				group['count'],
+				group['wall'] * 1000.0,
+				group['cpu'] * 1000.0,
+				group['peakMemory'] / 1048576.0,
+				group['bytesRead'] / 1024.0,
+				group['bytesWritten'] / 1024.0
+			))
+		return lines
+
+def StartProfiling (toolName):
+	# profiling is enabled by the O3DV_PROFILE environment variable, the
+	# results are written to build/profile when the tool exits
+	global gProfiler
+	if not os.environ.get (ProfileEnvironmentVariable):
+		return
+	gProfiler = Profiler (toolName)
+	atexit.register (FinishProfiling)
+
+def FinishProfiling ():
+	global gProfiler
+	if gProfiler == None:
+		return
+	profiler = gProfiler
+	gProfiler = None
+	profiler.Finish ()
+
+def StopProfiling ():
+	# forked worker processes inherit the profiler, but they send their
+	# records to the main process instead of writing them
+	global gProfiler
+	if gProfiler == None:
+		return
+	gProfiler = None
+	tracemalloc.stop ()
+
+def AddProfileBytes (bytesRead, bytesWritten):
+	if gProfiler != None:
+		gProfiler.AddBytes (bytesRead, bytesWritten)
+
+def CreateProfileRecord (name, category, startTime, startCpuTime, bytesRead = 0, bytesWritten = 0, args = None):
+	# records can be created in worker processes, and added to the profiler
+	# of the main process with AddProfileRecord
+	return {
+		'name' : name,
+		'category' : category,
+		'start' : startTime,
+		'wall' : time.perf_counter () - startTime,
+		'cpu' : time.thread_time () - startCpuTime,
+		'peakMemory' : 0,
+		'bytesRead' : bytesRead,
+		'bytesWritten' : bytesWritten,
+		'args' : args,
+		'pid' : os.getpid (),
+		'tid' : threading.get_ident (),
+		'depth' : 0
+	}
+
+def AddProfileRecord (record):
+	# the record is nested in the current step of the calling thread, the
+	# bytes of records from the same process are already counted there
+	if gProfiler == None:
+		return
+	currentStep = gProfiler.GetCurrentStep ()
+	record['depth'] = currentStep.depth + 1 if currentStep != None else 0
+	if record['pid'] != os.getpid ():
+		gProfiler.AddBytes (record['bytesRead'], record['bytesWritten'])
+	gProfiler.AddRecord (record)
+
+def GetEOLChar (content):
 	if content.count ('\r\n') > 0:
 		return '\r\n'
 	else:
 		return '\n'
 
+def GetEOLCharFromFile (filePath):
+	return GetEOLChar (GetFileContent (filePath))
+
+def IsShellNeededForCommands ():
+	# npm installs the tools as .cmd files on windows
+	return platform.system () == 'Windows'
+
 def RunCommand (executable, arguments):
-	command = executable + ' "' + '" "'.join (arguments) + '"'
-	return os.system (command)
+	try:
+		result = subprocess.run ([executable] + arguments, shell = IsShellNeededForCommands ())
+	except OSError as error:
+		PrintError (str (error))
+		return 127
+	return result.returncode
+
+def RunCommandWithOutput (executable, arguments):
+	try:
+		result = subprocess.run ([executable] + arguments, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, shell = IsShellNeededForCommands ())
+	except OSError as error:
+		return 127, str (error)
+	return result.returncode, result.stdout.decode ('utf-8', errors = 'replace')
 
 class TokenReplacer:
 	def __init__ (self, filePath, keepToken):
@@ -53,15 +406,8 @@ class TokenReplacer:
 		if begPosition == -1 or endPosition == -1:
 			return
 		fileLinks = []
-		for fileUrl in fileUrls:
-			fileSourceUrl = fileUrl
-			if version != None:
-				fileSourceUrl += '?v=' + version
-			extension = os.path.splitext (fileUrl)[1]
-			if (extension == '.js'):
-				fileLinks.append (linePrefix + '<script type="text/javascript" src="' + fileSourceUrl + '"></script>')
-			elif (extension == '.css'):
-				fileLinks.append (linePrefix + '<link rel="stylesheet" type="text/css" href="' + fileSourceUrl + '">')
+		for fileLink in CreateFileLinkLines (fileUrls, version):
+			fileLinks.append (linePrefix + fileLink)
 		newContent = self.eolChar.join (fileLinks)
 		self.ReplaceContent (begToken, endToken, begPosition, endPosition + len (endToken), linePrefix, newContent)
 
@@ -78,15 +424,10 @@ class TokenReplacer:
 
 	def GetTokenBegPosition (self, begToken):
 		begPosition = self.fileContent.find (begToken)
-		linePrefix = ''
 		if begPosition == -1:
 			return -1, ''
-		while begPosition > 0:
-			if self.fileContent[begPosition - 1] == '\n':
-				break
-			begPosition -= 1
-			linePrefix = self.fileContent[begPosition] + linePrefix
-		return begPosition, linePrefix
+		lineBegPosition = self.fileContent.rfind ('\n', 0, begPosition) + 1
+		return lineBegPosition, self.fileContent[lineBegPosition : begPosition]
 
 	def GetTokenEndPosition (self, endToken):
 		return self.fileContent.find (endToken)
@@ -97,6 +438,59 @@ class TokenReplacer:
 		else:
 			return '\n'
 
+class TokenTemplate:
+	# parses every <!-- name start --> ... <!-- name end --> region once, so
+	# all of them can be replaced in a single pass over the content
+	def __init__ (self, filePath, keepToken):
+		self.fileContent = GetFileContent (filePath)
+		self.eolChar = GetEOLChar (self.fileContent)
+		self.keepToken = keepToken
+		self.parts = []
+		self.regions = []
+		self.Parse ()
+
+	def Parse (self):
+		position = 0
+		for match in TokenBegPattern.finditer (self.fileContent):
+			if match.start () < position:
+				continue
+			name = match.group (2)
+			endToken = '<!-- ' + name + ' end -->'
+			endPosition = self.fileContent.find (endToken, match.end ())
+			if endPosition == -1:
+				continue
+			endPosition += len (endToken)
+			self.parts.append (self.fileContent[position : match.start ()])
+			self.regions.append ({
+				'name' : name,
+				'linePrefix' : match.group (1),
+				'content' : self.fileContent[match.start () : endPosition]
+			})
+			position = endPosition
+		self.parts.append (self.fileContent[position :])
+
+	def Render (self, regionLines):
+		result = []
+		for i in range (0, len (self.regions)):
+			result.append (self.parts[i])
+			region = self.regions[i]
+			name = region['name']
+			if not name in regionLines:
+				result.append (region['content'])
+				continue
+			linePrefix = region['linePrefix']
+			newContent = self.eolChar.join ([linePrefix + line for line in regionLines[name]])
+			if self.keepToken:
+				begToken = '<!-- ' + name + ' start -->'
+				endToken = '<!-- ' + name + ' end -->'
+				newContent = linePrefix + begToken + self.eolChar + newContent + self.eolChar + linePrefix + endToken
+			result.append (newContent)
+		result.append (self.parts[-1])
+		return ''.join (result)
+
+	def WriteToFile (self, filePath, regionLines):
+		WriteContentToFile (filePath, self.Render (regionLines))
+
 def ReplaceInFile (filePath, begToken, endToken, newContent):
 	content = GetFileContent (filePath)
 	begPosition = content.find (begToken)
@@ -122,6 +516,19 @@ def ReplaceRegexInFile (filePath, oldRegex, newRegex):
 	content = re.sub (oldRegex, newRegex, content)
 	WriteContentToFile (filePath, content)
 
+def CreateFileLinkLines (fileUrls, version):
+	fileLinks = []
+	for fileUrl in fileUrls:
+		fileSourceUrl = fileUrl
+		if version != None:
+			fileSourceUrl += '?v=' + version
+		extension = os.path.splitext (fileUrl)[1]
+		if (extension == '.js'):
+			fileLinks.append ('<script type="text/javascript" src="' + fileSourceUrl + '"></script>')
+		elif (extension == '.css'):
+			fileLinks.append ('<link rel="stylesheet" type="text/css" href="' + fileSourceUrl + '">')
+	return fileLinks
+
 def CreateFileLinks (fileUrls, linePrefix, eolChar):
 	result = ''
 	for fileUrl in fileUrls:
@@ -1,55 +1,224 @@
 import os
 import sys
 import re
+import json
+import hashlib
+import concurrent.futures
 
 from lib import utils as Utils
 
+CacheVersion = 4
+
+ExportPatterns = [
+	re.compile ('export class ([a-zA-Z0-9]+)'),
+	re.compile ('export function ([a-zA-Z0-9]+)'),
+	re.compile ('export const ([a-zA-Z0-9]+)'),
+	re.compile ('export let ([a-zA-Z0-9]+)')
+]
+
+ImportPattern = re.compile ('^import\\s+(.+?)\\s+from\\s+\'([^\']+)\'', re.MULTILINE | re.DOTALL)
+
+# every entry re-exports the symbols of the listed directories and files, so
+# heavy format support can be loaded separately from the core and the viewer
+EngineEntries = [
+	('core', ['core/', 'geometry/', 'io/', 'model/', 'parameters/']),
+	('viewer', ['threejs/', 'viewer/']),
+	('import', ['import/importer.js', 'import/importerbase.js', 'import/importerfiles.js', 'import/importerutils.js']),
+	('import_mesh', ['import/importer3ds.js', 'import/importergltf.js', 'import/importerobj.js', 'import/importeroff.js', 'import/importerply.js', 'import/importerstl.js']),
+	('import_cad', ['import/importer3dm.js', 'import/importerbim.js', 'import/importerfcstd.js', 'import/importerifc.js', 'import/importerocct.js']),
+	('import_three', ['import/importersvg.js', 'import/importerthree.js']),
+	('export', ['export/'])
+]
+
+@Utils.Profiled ('scan_file', 'file', 'engineFilePath')
+def ScanEngineFile (engineFilePath, cachedEntry):
+	with open (engineFilePath, 'rb') as engineFile:
+		content = engineFile.read ()
+	Utils.AddProfileBytes (len (content), 0)
+	contentHash = hashlib.sha256 (content).hexdigest ()
+	if cachedEntry != None and cachedEntry['hash'] == contentHash:
+		return cachedEntry
+	content = content.decode ('utf-8')
+	matches = []
+	for pattern in ExportPatterns:
+		matches.extend (pattern.findall (content))
+	imports = []
+	for importMatch in ImportPattern.finditer (content):
+		importedNames = importMatch.group (1).strip ()
+		if importedNames.startswith ('{'):
+			symbols = [name.strip () for name in importedNames.strip ('{}').split (',') if len (name.strip ()) > 0]
+		else:
+			symbols = [importedNames]
+		imports.append ([importMatch.group (2), symbols])
+	return {
+		'hash' : contentHash,
+		'exports' : matches,
+		'imports' : imports
+	}
+
+def ScanEngineFiles (sourceFolder, relativePaths, cachePath):
+	# the export list of every file is cached by content hash, so only the
+	# changed files are scanned again
+	oldCache = {}
+	if os.path.exists (cachePath):
+		with open (cachePath) as cacheFile:
+			oldCache = json.load (cacheFile)
+	oldFiles = oldCache['files'] if 'version' in oldCache and oldCache['version'] == CacheVersion else {}
+
+	files = {}
+	with concurrent.futures.ThreadPoolExecutor () as executor:
+		futures = {}
+		for relativePath in relativePaths:
+			engineFilePath = os.path.join (sourceFolder, relativePath)
+			cachedEntry = oldFiles[relativePath] if relativePath in oldFiles else None
+			futures[relativePath] = executor.submit (ScanEngineFile, engineFilePath, cachedEntry)
+		for relativePath in futures:
+			files[relativePath] = futures[relativePath].result ()
+
+	if files != oldFiles:
+		cacheDir = os.path.dirname (cachePath)
+		if not os.path.exists (cacheDir):
+			os.makedirs (cacheDir)
+		with open (cachePath, 'w') as cacheFile:
+			json.dump ({ 'version' : CacheVersion, 'files' : files }, cacheFile, indent = 4, sort_keys = True)
+	return files
+
+def GenerateExportsContent (relativePaths, files, importPrefix, eolChar):
+	exportedSymbols = []
+	content = ''
+	for relativePath in relativePaths:
+		matches = files[relativePath]['exports']
+		if len (matches) == 0:
+			continue
+		content += 'import { ' + ', '.join (matches) + ' } from \'' + importPrefix + relativePath + '\';' + eolChar
+		for match in matches:
+			exportedSymbols.append (match)
+
+	content += eolChar + 'export {' + eolChar
+	for i in range (0, len (exportedSymbols)):
+		exportedSymbol = exportedSymbols[i]
+		content += '    ' + exportedSymbol
+		if i < len (exportedSymbols) - 1:
+			content += ','
+		content += eolChar
+	content += '};' + eolChar
+	return content
+
+def WriteFileIfChanged (filePath, content):
+	# files are written only if they changed, so their mtime does not trigger
+	# downstream bundler work when nothing changed
+	if os.path.exists (filePath) and Utils.GetFileContent (filePath) == content:
+		return False
+	Utils.WriteContentToFile (filePath, content)
+	return True
+
+def GetEntryName (relativePath):
+	for entryName, entryPaths in EngineEntries:
+		for entryPath in entryPaths:
+			if relativePath == entryPath or (entryPath.endswith ('/') and relativePath.startswith (entryPath)):
+				return entryName
+	return None
+
+def ResolveImport (relativePath, importSource):
+	if not importSource.startswith ('.'):
+		return None
+	importPath = os.path.normpath (os.path.join (os.path.dirname (relativePath), importSource))
+	return importPath.replace (os.sep, '/')
+
+@Utils.Profiled ('dependency_report')
+def CreateDependencyReport (entryFiles, files):
+	report = {}
+	for entryName, relativePaths in entryFiles.items ():
+		visited = set ()
+		stack = list (relativePaths)
+		pulledSymbols = {}
+		externals = set ()
+		while len (stack) > 0:
+			relativePath = stack.pop ()
+			if relativePath in visited:
+				continue
+			visited.add (relativePath)
+			for importSource, symbols in files[relativePath]['imports']:
+				importPath = ResolveImport (relativePath, importSource)
+				if importPath == None:
+					externals.add (importSource)
+					continue
+				stack.append (importPath)
+				importEntryName = GetEntryName (importPath)
+				if importEntryName != entryName:
+					if not importEntryName in pulledSymbols:
+						pulledSymbols[importEntryName] = set ()
+					pulledSymbols[importEntryName].update (symbols)
+		report[entryName] = {
+			'files' : sorted (relativePaths),
+			'closureFiles' : len (visited),
+			'externals' : sorted (externals),
+			'pulledSymbols' : { name : sorted (symbols) for name, symbols in pulledSymbols.items () }
+		}
+	return report
+
 def Main (argv):
 	toolsDir = os.path.dirname (os.path.abspath (__file__))
 	rootDir = os.path.dirname (toolsDir)
 	os.chdir (rootDir)
+	Utils.StartProfiling ('update_engine_exports')
 
-	engineFiles = []
+	relativePaths = []
 	sourceFolder = os.path.join (rootDir, 'source', 'engine')
+	entriesFolder = os.path.join (sourceFolder, 'entries')
 	for dirName in sorted (os.listdir (sourceFolder)):
 		dirPath = os.path.join (sourceFolder, dirName)
-		if not os.path.isdir (dirPath):
+		if not os.path.isdir (dirPath) or dirPath == entriesFolder:
 			continue
 		for fileName in sorted (os.listdir (dirPath)):
-			engineFiles.append ({
-				'dirName': dirName,
-				'fileName': fileName
-			})
+			relativePaths.append (dirName + '/' + fileName)
 
 	mainFilePath = os.path.join (sourceFolder, 'main.js')
 	eolChar = Utils.GetEOLCharFromFile (mainFilePath)
 
-	exportedSymbols = []
-	mainFileContent = ''
-	for engineFile in engineFiles:
-		engineFilePath = os.path.join (sourceFolder, engineFile['dirName'], engineFile['fileName'])
-		content = Utils.GetFileContent (engineFilePath)
-		matches = re.findall ('export class ([a-zA-Z0-9]+)', content)
-		matches.extend (re.findall ('export function ([a-zA-Z0-9]+)', content))
-		matches.extend (re.findall ('export const ([a-zA-Z0-9]+)', content))
-		matches.extend (re.findall ('export let ([a-zA-Z0-9]+)', content))
-		if len (matches) == 0:
+	cachePath = os.path.join (rootDir, 'build', 'cache', 'engine_exports.json')
+	with Utils.ProfileStep ('scan'):
+		files = ScanEngineFiles (sourceFolder, relativePaths, cachePath)
+
+	mainFileContent = GenerateExportsContent (relativePaths, files, './', eolChar)
+	if WriteFileIfChanged (mainFilePath, mainFileContent):
+		Utils.PrintInfo ('Engine exports updated.')
+
+	entryFiles = {}
+	for entryName, entryPaths in EngineEntries:
+		entryFiles[entryName] = []
+	for relativePath in relativePaths:
+		if len (files[relativePath]['exports']) == 0:
 			continue
-		relativePath = './' + engineFile['dirName'] + '/' + engineFile['fileName']
-		mainFileContent += 'import { ' + ', '.join (matches) + ' } from \'' + relativePath + '\';' + eolChar
-		for match in matches:
-			exportedSymbols.append (match)
+		entryName = GetEntryName (relativePath)
+		if entryName == None:
+			Utils.PrintError ('No engine entry for ' + relativePath + '.')
+			return 1
+		entryFiles[entryName].append (relativePath)
 
-	mainFileContent += eolChar + 'export {' + eolChar
-	for i in range (0, len (exportedSymbols)):
-		exportedSymbol = exportedSymbols[i]
-		mainFileContent += '    ' + exportedSymbol
-		if i < len (exportedSymbols) - 1:
-			mainFileContent += ','
-		mainFileContent += eolChar
-	mainFileContent += '};' + eolChar
+	if not os.path.exists (entriesFolder):
+		os.makedirs (entriesFolder)
+	for entryName in entryFiles:
+		entryContent = GenerateExportsContent (entryFiles[entryName], files, '../', eolChar)
+		if WriteFileIfChanged (os.path.join (entriesFolder, entryName + '.js'), entryContent):
+			Utils.PrintInfo ('Engine entry ' + entryName + ' updated.')
 
-	Utils.WriteContentToFile (mainFilePath, mainFileContent)
+	# the report is printed only when it changed, so an unchanged engine
+	# does not repeat it on every run
+	report = CreateDependencyReport (entryFiles, files)
+	reportPath = os.path.join (rootDir, 'build', 'engine', 'entries_report.json')
+	os.makedirs (os.path.dirname (reportPath), exist_ok = True)
+	if not WriteFileIfChanged (reportPath, json.dumps (report, indent = 4, sort_keys = True) + eolChar):
+		return 0
+	for entryName, entryReport in report.items ():
+		pulledCount = sum (len (symbols) for symbols in entryReport['pulledSymbols'].values ())
+		Utils.PrintInfo ('Entry {0}: {1} files, {2} files including dependencies, {3} symbols from {4}.'.format (
+			entryName,
+			len (entryReport['files']),
+			entryReport['closureFiles'],
+			pulledCount,
+			', '.join (sorted (entryReport['pulledSymbols'].keys ())) or 'no other entry'
+		))
 	return 0
 
 sys.exit (Main (sys.argv))